@@ -0,0 +1,81 @@
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import SendMessage, EditMessageText
+from aiogram.types import Message, Chat, User, Update, CallbackQuery, InlineKeyboardMarkup
+from datetime import datetime
+import itertools
+
+BOT_ID = 42
+
+
+class FakeSession(BaseSession):
+    # Сессия без сети: запоминает вызовы Bot API и отвечает правдоподобно
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+        self._message_ids = itertools.count(1)
+
+    async def make_request(self, bot, method, timeout=None):
+        self.calls.append(method)
+        if isinstance(method, (SendMessage, EditMessageText)):
+            markup = method.reply_markup if isinstance(method.reply_markup, InlineKeyboardMarkup) else None
+            return Message(
+                message_id=next(self._message_ids),
+                date=datetime.now(),
+                chat=Chat(id=method.chat_id or 0, type="private"),
+                text=method.text,
+                reply_markup=markup
+            )
+        return True
+
+    async def stream_content(self, *args, **kwargs):
+        yield b""
+
+    async def close(self):
+        pass
+
+
+def make_bot() -> tuple[Bot, FakeSession]:
+    session = FakeSession()
+    return Bot(f"{BOT_ID}:FAKE", session=session), session
+
+
+_update_ids = itertools.count(1)
+
+
+def _user(telegram_id: int) -> User:
+    return User(id=telegram_id, is_bot=False, first_name="user")
+
+
+def message_update(telegram_id: int, text: str) -> Update:
+    update_id = next(_update_ids)
+    return Update(
+        update_id=update_id,
+        message=Message(
+            message_id=update_id,
+            date=datetime.now(),
+            chat=Chat(id=telegram_id, type="private"),
+            from_user=_user(telegram_id),
+            text=text
+        )
+    )
+
+
+def callback_update(telegram_id: int, data: str, message_id: int = 1) -> Update:
+    update_id = next(_update_ids)
+    return Update(
+        update_id=update_id,
+        callback_query=CallbackQuery(
+            id=str(update_id),
+            from_user=_user(telegram_id),
+            chat_instance="bench",
+            data=data,
+            message=Message(
+                message_id=message_id,
+                date=datetime.now(),
+                chat=Chat(id=telegram_id, type="private"),
+                from_user=User(id=BOT_ID, is_bot=True, first_name="bot"),
+                text="..."
+            )
+        )
+    )
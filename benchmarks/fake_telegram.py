@@ -0,0 +1,308 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+import statistics
+import time
+from collections import deque
+
+from aiohttp import web, ClientSession
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Локальная замена Bot API для нагрузочных прогонов.
+#   python benchmarks/fake_telegram.py --port 8081 --users 200 --rate 50 --duration 30
+#   TELEGRAM_API_URL=http://127.0.0.1:8081 BOT_TOKEN=42:FAKE python main.py
+# Сервер отдаёт обновления через getUpdates или шлёт их на вебхук,
+# ограничивает отправку как Telegram и считает задержку от обновления до ответа.
+
+BOT_USER = {"id": 42, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"}
+SCRIPT = ["/start", "🐾 Профиль", "Мои напоминания", "📚 Справка", "🐶 Собака", "🍽 Уход", "🔙 Главное меню"]
+REPLY_METHODS = {"sendmessage", "editmessagetext", "editmessagereplymarkup", "answercallbackquery"}
+LIMITED_METHODS = {"sendmessage", "editmessagetext", "editmessagereplymarkup"}
+WEBHOOK_ATTEMPTS = 10
+WEBHOOK_RETRY_DELAY = 0.5
+
+
+class FloodLimit:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def take(self) -> float:
+        # 0, если можно отправить, иначе через сколько секунд повторить
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class FakeTelegram:
+    def __init__(self, rate: float = 30, chat_rate: float = 1, chat_burst: float = 3):
+        self.rate = rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.global_limit = FloodLimit(rate, rate)
+        self.chat_limits: dict[int, FloodLimit] = {}
+
+        self.updates: deque[dict] = deque()
+        self.new_updates = asyncio.Event()
+        self.update_ids = itertools.count(1)
+        self.message_ids = itertools.count(1)
+        self.webhook_url: str | None = None
+        self.webhook_secret: str | None = None
+        self.connected = asyncio.Event()
+
+        # chat_id -> время отправки обновлений, на которые ещё нет ответа
+        self.pending: dict[int, deque[float]] = {}
+        self.callback_chats: dict[str, int] = {}
+        self.latencies: list[float] = []
+        self.last_reply_at = 0.0
+        self.sent = 0
+        self.flood_errors = 0
+        self.calls: dict[str, int] = {}
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route("*", "/bot{token}/{method}", self.handle)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"].lower()
+        self.calls[method] = self.calls.get(method, 0) + 1
+        params = dict(await request.post())
+        if request.query:
+            params.update(request.query)
+
+        if method in LIMITED_METHODS:
+            retry_after = self._check_flood(int(params.get("chat_id", 0)))
+            if retry_after:
+                self.flood_errors += 1
+                return web.json_response({
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {math.ceil(retry_after)}",
+                    "parameters": {"retry_after": math.ceil(retry_after)}
+                })
+
+        if method in REPLY_METHODS:
+            self._record_reply(params)
+
+        handler = getattr(self, f"api_{method}", None)
+        result = await handler(params) if handler else True
+        return web.json_response({"ok": True, "result": result})
+
+    def _check_flood(self, chat_id: int) -> float:
+        chat_limit = self.chat_limits.get(chat_id)
+        if chat_limit is None:
+            chat_limit = self.chat_limits[chat_id] = FloodLimit(self.chat_rate, self.chat_burst)
+        return chat_limit.take() or self.global_limit.take()
+
+    def _record_reply(self, params: dict):
+        if "callback_query_id" in params:
+            chat_id = self.callback_chats.pop(params["callback_query_id"], None)
+        else:
+            chat_id = int(params.get("chat_id", 0))
+        waiting = self.pending.get(chat_id)
+        if waiting:
+            self.last_reply_at = time.monotonic()
+            self.latencies.append(self.last_reply_at - waiting.popleft())
+
+    def _message(self, params: dict) -> dict:
+        self.sent += 1
+        return {
+            "message_id": next(self.message_ids),
+            "date": int(time.time()),
+            "chat": {"id": int(params.get("chat_id", 0)), "type": "private"},
+            "from": BOT_USER,
+            "text": params.get("text", "")
+        }
+
+    async def api_getme(self, params):
+        return BOT_USER
+
+    async def api_getupdates(self, params):
+        self.connected.set()
+        offset = int(params.get("offset") or 0)
+        while self.updates and self.updates[0]["update_id"] < offset:
+            self.updates.popleft()
+        if not self.updates:
+            self.new_updates.clear()
+            try:
+                await asyncio.wait_for(self.new_updates.wait(), timeout=float(params.get("timeout") or 0))
+            except asyncio.TimeoutError:
+                pass
+        limit = int(params.get("limit") or 100)
+        return list(itertools.islice(self.updates, limit))
+
+    async def api_setwebhook(self, params):
+        self.webhook_url = params.get("url")
+        self.webhook_secret = params.get("secret_token")
+        self.connected.set()
+        return True
+
+    async def api_deletewebhook(self, params):
+        self.webhook_url = None
+        return True
+
+    async def api_getwebhookinfo(self, params):
+        return {"url": self.webhook_url or "", "has_custom_certificate": False, "pending_update_count": len(self.updates)}
+
+    async def api_sendmessage(self, params):
+        return self._message(params)
+
+    async def api_editmessagetext(self, params):
+        return self._message(params)
+
+    async def push(self, update: dict, http: ClientSession):
+        update["update_id"] = next(self.update_ids)
+        chat_id, callback_id = _update_chat(update)
+        if chat_id is not None:
+            self.pending.setdefault(chat_id, deque()).append(time.monotonic())
+        if callback_id is not None:
+            self.callback_chats[callback_id] = chat_id
+
+        if self.webhook_url:
+            await self._post_webhook(update, http)
+        else:
+            self.updates.append(update)
+            self.new_updates.set()
+
+    async def _post_webhook(self, update: dict, http: ClientSession):
+        # Как и Telegram, повторяем доставку, пока вебхук недоступен:
+        # бот вызывает setWebhook до того, как начинает слушать порт
+        headers = {"X-Telegram-Bot-Api-Secret-Token": self.webhook_secret} if self.webhook_secret else {}
+        for attempt in range(WEBHOOK_ATTEMPTS):
+            try:
+                async with http.post(self.webhook_url, json=update, headers=headers) as response:
+                    if response.status == 200:
+                        return
+                    logger.warning(f"Вебхук ответил {response.status}")
+            except Exception as e:
+                logger.warning(f"Вебхук недоступен: {e}")
+            await asyncio.sleep(WEBHOOK_RETRY_DELAY)
+        logger.error(f"Обновление {update['update_id']} не доставлено на вебхук")
+
+    async def replay(self, updates, rate: float):
+        async with ClientSession() as http:
+            started = time.monotonic()
+            for number, update in enumerate(updates):
+                delay = started + number / rate - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await self.push(update, http)
+
+    def report(self, started: float) -> dict:
+        # Пропускная способность считается до последнего ответа, без ожидания в конце
+        elapsed = max(self.last_reply_at - started, 0)
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+        return {
+            "updates": next(self.update_ids) - 1,
+            "replies": len(latencies),
+            "unanswered": sum(len(waiting) for waiting in self.pending.values()),
+            "throughput_rps": len(latencies) / elapsed if elapsed else 0,
+            "latency_ms_p50": percentile(0.5),
+            "latency_ms_p95": percentile(0.95),
+            "latency_ms_p99": percentile(0.99),
+            "latency_ms_mean": statistics.mean(latencies) * 1000 if latencies else None,
+            "messages_sent": self.sent,
+            "flood_errors": self.flood_errors,
+            "calls": self.calls
+        }
+
+
+def _update_chat(update: dict) -> tuple[int | None, str | None]:
+    if "message" in update:
+        return update["message"]["chat"]["id"], None
+    if "callback_query" in update:
+        query = update["callback_query"]
+        return query["from"]["id"], query["id"]
+    return None, None
+
+
+def synthetic_updates(users: int, count: int):
+    # Пользователи по кругу проходят SCRIPT, каждый со своим шагом
+    for number in range(count):
+        user_id = 1000 + number % users
+        text = SCRIPT[(number // users) % len(SCRIPT)]
+        yield {
+            "message": {
+                "message_id": number + 1,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"},
+                "text": text
+            }
+        }
+
+
+def recorded_updates(path: str):
+    # JSONL с объектами Update; update_id заменяется на свой
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                update = json.loads(line)
+                update.pop("update_id", None)
+                yield update
+
+
+async def run(args):
+    fake = FakeTelegram(rate=args.flood_rate, chat_rate=args.chat_rate, chat_burst=args.chat_burst)
+    runner = web.AppRunner(fake.app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, args.host, args.port).start()
+    logger.info(f"Фейковый Bot API на http://{args.host}:{args.port}, ждём бота")
+
+    try:
+        await fake.connected.wait()
+        if args.replay:
+            updates = recorded_updates(args.replay)
+        else:
+            updates = synthetic_updates(args.users, int(args.rate * args.duration))
+
+        started = time.monotonic()
+        await fake.replay(updates, args.rate)
+        # Даём боту ответить на последние обновления
+        await asyncio.sleep(args.grace)
+        report = fake.report(started)
+    finally:
+        await runner.cleanup()
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Фейковый Telegram Bot API для нагрузочных прогонов")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--rate", type=float, default=20, help="обновлений в секунду")
+    parser.add_argument("--duration", type=float, default=30, help="длительность синтетического потока, с")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--replay", help="JSONL с записанными обновлениями")
+    parser.add_argument("--grace", type=float, default=5, help="сколько ждать ответов после потока, с")
+    parser.add_argument("--flood-rate", type=float, default=30, help="сообщений в секунду на бота")
+    parser.add_argument("--chat-rate", type=float, default=1, help="сообщений в секунду в один чат")
+    parser.add_argument("--chat-burst", type=float, default=3, help="сколько сообщений в чат можно подряд")
+    parser.add_argument("--output", help="куда записать отчёт в JSON")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
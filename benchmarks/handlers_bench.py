@@ -0,0 +1,266 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+# Запуск из корня репозитория:
+#   python benchmarks/handlers_bench.py --sizes 10000,100000 --output bench.json
+#   python benchmarks/handlers_bench.py --sizes 10000 --baseline bench.json
+# Каждый размер считается в отдельном процессе со своей базой во временном
+# каталоге: database.py открывает базу при импорте.
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+
+DEFAULT_SIZES = "10000,100000"
+PETS_PER_USER = 3
+REMINDERS_PER_PET = 2
+CHUNK_SIZE = 50000
+
+
+def populate(engine, pets: int):
+    # pets питомцев, по PETS_PER_USER у пользователя и по REMINDERS_PER_PET напоминания у каждого.
+    # Питомцы пользователя u имеют id u, u + users, u + 2 * users.
+    users = max(1, pets // PETS_PER_USER)
+    today = date.today()
+
+    def chunks(rows):
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= CHUNK_SIZE:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def pet_rows():
+        for pet_id in range(1, pets + 1):
+            # Сроки прививок равномерно на год вперёд, включая сегодняшний день
+            next_due = today + timedelta(days=pet_id % 365)
+            yield (
+                pet_id, f"pet{pet_id}", None, "CAT" if pet_id % 2 else "DOG",
+                (next_due - timedelta(days=365)).isoformat(),
+                next_due.isoformat(),
+                (pet_id - 1) % users + 1
+            )
+
+    def reminder_rows():
+        reminder_id = 0
+        for pet_id in range(1, pets + 1):
+            for _ in range(REMINDERS_PER_PET):
+                reminder_id += 1
+                yield reminder_id, (reminder_id * 7) % 1440, 0b1111111, pet_id, datetime.now().isoformat()
+
+    with engine.begin() as connection:
+        for chunk in chunks((user_id, user_id) for user_id in range(1, users + 1)):
+            connection.exec_driver_sql("INSERT INTO users (id, telegram_id) VALUES (?, ?)", chunk)
+        for chunk in chunks(pet_rows()):
+            connection.exec_driver_sql(
+                "INSERT INTO pets (id, name, breed, pet_type, vaccination_date, next_vaccination_due, owner_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                chunk
+            )
+        for chunk in chunks(reminder_rows()):
+            connection.exec_driver_sql(
+                "INSERT INTO reminders (id, minute_of_day, weekdays, pet_id, created_at) VALUES (?, ?, ?, ?, ?)",
+                chunk
+            )
+    return users
+
+
+async def run_worker(size: int, repeat: int) -> list[dict]:
+    logging.basicConfig(level=logging.WARNING)
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, BENCH_DIR)
+
+    from aiogram import Dispatcher
+    from sqlalchemy import event, delete
+    import database
+    import handlers
+    import notifications
+    import user_cache
+    from fake_bot import make_bot, message_update, callback_update
+
+    started = time.perf_counter()
+    users = populate(database.engine, size)
+    results = [{"operation": "populate", "wall_ms": (time.perf_counter() - started) * 1000}]
+
+    queries = [0]
+
+    def count_query(*args):
+        queries[0] += 1
+
+    event.listen(database.engine, "before_cursor_execute", count_query)
+    event.listen(database.async_engine.sync_engine, "before_cursor_execute", count_query)
+
+    bot, session = make_bot()
+    dp = Dispatcher()
+    handlers.register_handlers(dp, bot)
+
+    async def schedule_jobs(i):
+        await notifications.schedule_jobs(bot)
+        # Тик не должен сработать посреди замеров
+        notifications.scheduler.pause()
+
+    def clear_outbox():
+        # Повторы в ту же минуту иначе отсекаются по key как уже отправленные
+        with database.engine.begin() as connection:
+            connection.execute(delete(database.OutboxMessage))
+
+    async def tick(i):
+        # Иначе минуту уже отметил обработанной догоняющий проход при запуске
+        notifications._last_ticks.clear()
+        clear_outbox()
+        await notifications._tick()
+        await notifications.flush_notifications()
+
+    async def vaccination_sweep(i):
+        # Иначе день уже отмечен обойдённым
+        with database.engine.begin() as connection:
+            connection.execute(delete(database.TickState).where(database.TickState.key.like("vaccination_sweep%")))
+        clear_outbox()
+        await notifications._vaccination_sweep()
+        await notifications.flush_notifications()
+
+    def feed(make_update, cold: bool):
+        async def run(i):
+            if cold:
+                user_cache.clear()
+            await dp.feed_update(bot, make_update(i))
+        return run
+
+    # (название, функция, меняет ли данные)
+    operations = [
+        ("schedule_jobs", schedule_jobs, False),
+        ("tick", tick, False),
+        ("vaccination_sweep", vaccination_sweep, True),
+        ("profile_cold", feed(lambda i: message_update(1, "🐾 Профиль"), True), False),
+        ("profile_warm", feed(lambda i: message_update(1, "🐾 Профиль"), False), False),
+        ("show_reminders_cold", feed(lambda i: message_update(1, "Мои напоминания"), True), False),
+        ("show_reminders_warm", feed(lambda i: message_update(1, "Мои напоминания"), False), False),
+        # Каждый повтор удаляет первого питомца следующего пользователя
+        ("delete_pet", feed(lambda i: callback_update(2 + i, f"delete_pet_{2 + i}_0"), False), True),
+    ]
+
+    run_index = 0
+    for name, operation, mutates in operations:
+        timings = []
+        for _ in range(repeat if not mutates else min(repeat, users - 2)):
+            session.calls.clear()
+            queries[0] = 0
+            started = time.perf_counter()
+            await operation(run_index)
+            timings.append((time.perf_counter() - started) * 1000)
+            run_index += 1
+        api_calls = len(session.calls)
+        query_count = queries[0]
+
+        # Память отдельным прогоном: tracemalloc заметно замедляет код
+        session.calls.clear()
+        tracemalloc.start()
+        await operation(run_index)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        run_index += 1
+
+        results.append({
+            "operation": name,
+            "wall_ms": statistics.median(timings),
+            "wall_ms_min": min(timings),
+            "peak_kb": peak / 1024,
+            "queries": query_count,
+            "api_calls": api_calls,
+            "runs": len(timings)
+        })
+
+    notifications.scheduler.shutdown(wait=False)
+    await database.async_engine.dispose()
+    return results
+
+
+def run_size(size: int, repeat: int) -> list[dict]:
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ, DATABASE_PATH=os.path.join(workdir, "pets.db"))
+        process = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", str(size), "--repeat", str(repeat)],
+            cwd=workdir, env=env, capture_output=True, text=True
+        )
+    if process.returncode != 0:
+        raise RuntimeError(f"Замер для {size} упал:\n{process.stderr}")
+    results = json.loads(process.stdout.strip().splitlines()[-1])
+    for result in results:
+        result["size"] = size
+    return results
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def print_report(results: list[dict], baseline: dict | None):
+    previous = {}
+    if baseline:
+        previous = {(row["size"], row["operation"]): row for row in baseline["results"]}
+
+    print(f"{'размер':>8} {'операция':22} {'мс':>10} {'пик, КБ':>10} {'запросы':>8} {'вызовы API':>10} {'к базовому':>10}")
+    for row in results:
+        change = ""
+        old = previous.get((row["size"], row["operation"]))
+        if old and old["wall_ms"]:
+            change = f"{(row['wall_ms'] / old['wall_ms'] - 1) * 100:+.0f}%"
+        print(
+            f"{row['size']:>8} {row['operation']:22} {row['wall_ms']:10.2f} "
+            f"{row.get('peak_kb', 0):10.0f} {row.get('queries', ''):>8} {row.get('api_calls', ''):>10} {change:>10}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры планировщика и обработчиков на синтетической базе")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="число питомцев через запятую")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="куда записать результаты в JSON")
+    parser.add_argument("--baseline", help="JSON прошлого запуска для сравнения")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        print(json.dumps(asyncio.run(run_worker(args.worker, args.repeat))))
+        return
+
+    results = []
+    for size in (int(size) for size in args.sizes.split(",")):
+        results.extend(run_size(size, args.repeat))
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "results": results
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print_report(results, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
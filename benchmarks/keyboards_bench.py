@@ -0,0 +1,49 @@
+import os
+import sys
+import timeit
+import tracemalloc
+
+# Запуск из корня репозитория: python benchmarks/keyboards_bench.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import keyboards
+
+NUMBER = 10000
+
+CASES = [
+    ("get_main_menu", keyboards.get_main_menu, ()),
+    ("get_days_keyboard", keyboards.get_days_keyboard, ()),
+    ("get_breeds_keyboard", keyboards.get_breeds_keyboard, (("Лабрадор", "Овчарка", "Бульдог"),)),
+    ("get_pets_keyboard", keyboards.get_pets_keyboard, (("Рекс", "Мурка", "Барсик"),)),
+    ("get_reminder_actions_keyboard", keyboards.get_reminder_actions_keyboard, ((1, 2, 3, 4, 5), 0, 3, 1)),
+    ("get_pet_management_keyboard", keyboards.get_pet_management_keyboard, (7, 1, 4)),
+]
+
+
+def allocated(func, args) -> int:
+    # Сколько байт выделяется за один вызов и остаётся живым, пока жив результат
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func(*args)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def main():
+    print(f"{'клавиатура':32} {'сборка, мкс':>12} {'кэш, мкс':>10} {'сборка, Б':>10} {'кэш, Б':>8}")
+    for name, cached, args in CASES:
+        build = cached.__wrapped__
+        cached(*args)
+
+        build_time = timeit.timeit(lambda: build(*args), number=NUMBER) / NUMBER * 1e6
+        cached_time = timeit.timeit(lambda: cached(*args), number=NUMBER) / NUMBER * 1e6
+        print(
+            f"{name:32} {build_time:12.2f} {cached_time:10.2f} "
+            f"{allocated(build, args):10} {allocated(cached, args):8}"
+        )
+
+
+if __name__ == '__main__':
+    main()
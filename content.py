@@ -0,0 +1,85 @@
+import json
+import logging
+import os
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Тексты справки и списки пород лежат в content/<локаль>.json.
+# Файлы читаются один раз, а изменённые перечитываются на лету:
+# не чаще раза в CHECK_INTERVAL секунд сверяется время изменения.
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'content')
+DEFAULT_LOCALE = 'ru'
+CHECK_INTERVAL = 5.0
+
+
+class Catalog:
+    def __init__(self, raw: dict):
+        self.breeds: dict[str, tuple[str, ...]] = {
+            pet_type: tuple(breeds) for pet_type, breeds in raw.get("breeds", {}).items()
+        }
+        self.breed_sets: dict[str, frozenset[str]] = {
+            pet_type: frozenset(breeds) for pet_type, breeds in self.breeds.items()
+        }
+        self.info: dict[tuple[str, str], str] = {
+            (pet_type, category): text
+            for pet_type, categories in raw.get("info", {}).items()
+            for category, text in categories.items()
+        }
+
+
+_catalogs: dict[str, Catalog] = {}
+_mtimes: dict[str, float] = {}
+_checked_at = 0.0
+
+
+def _load(locale: str, path: str, mtime: float):
+    try:
+        with open(path, encoding='utf-8') as f:
+            _catalogs[locale] = Catalog(json.load(f))
+        logger.info(f"Загружены тексты {locale}")
+    except Exception as e:
+        # Остаёмся на прежней версии, пока файл не исправят
+        logger.error(f"Ошибка загрузки текстов {locale}: {e}")
+    _mtimes[locale] = mtime
+
+
+def reload_content():
+    global _checked_at
+    _checked_at = time.monotonic()
+    try:
+        names = os.listdir(CONTENT_DIR)
+    except Exception as e:
+        logger.error(f"Ошибка чтения каталога текстов: {e}")
+        return
+
+    for name in names:
+        locale, ext = os.path.splitext(name)
+        if ext != '.json':
+            continue
+        path = os.path.join(CONTENT_DIR, name)
+        mtime = os.path.getmtime(path)
+        if _mtimes.get(locale) != mtime:
+            _load(locale, path, mtime)
+
+
+def get_catalog(locale: str | None = None) -> Catalog:
+    if time.monotonic() - _checked_at >= CHECK_INTERVAL:
+        reload_content()
+    return _catalogs.get(locale) or _catalogs.get(DEFAULT_LOCALE) or Catalog({})
+
+
+def get_breeds(pet_type: str, locale: str | None = None) -> tuple[str, ...]:
+    return get_catalog(locale).breeds.get(pet_type, ())
+
+
+def is_known_breed(pet_type: str, breed: str, locale: str | None = None) -> bool:
+    return breed in get_catalog(locale).breed_sets.get(pet_type, ())
+
+
+def get_info_text(pet_type: str, category: str, locale: str | None = None) -> str | None:
+    return get_catalog(locale).info.get((pet_type, category))
+
+
+reload_content()
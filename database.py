@@ -1,8 +1,52 @@
-from sqlalchemy import create_engine, Column, Integer, String, ForeignKey, Enum, DateTime
-from sqlalchemy.orm import declarative_base, sessionmaker, relationship
+from sqlalchemy import create_engine, select, update, or_, Column, Integer, Float, String, Text, Boolean, ForeignKey, Enum, DateTime, Date
+from sqlalchemy.orm import declarative_base, sessionmaker, relationship, contains_eager
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.dialects.sqlite import insert
+from migrations import migrate
 from enum import Enum as PyEnum
-from datetime import datetime
+from datetime import datetime, date
+from dateutil.relativedelta import relativedelta
 import pytz
+import os
+
+EVERY_DAY = 0b1111111
+WEEKDAY_NAMES = ("Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс")
+
+
+def parse_time(text: str) -> int:
+    hour, minute = map(int, text.split(':'))
+    return hour * 60 + minute
+
+
+def format_time(minute_of_day: int) -> str:
+    return f"{minute_of_day // 60:02d}:{minute_of_day % 60:02d}"
+
+
+def format_days(weekdays: int) -> str:
+    if weekdays == EVERY_DAY:
+        return "ежедневно"
+    return ", ".join(name for i, name in enumerate(WEEKDAY_NAMES) if weekdays & (1 << i))
+
+
+def parse_date(text: str) -> date:
+    return datetime.strptime(text, "%d.%m.%Y").date()
+
+
+def format_date(value: date) -> str:
+    return value.strftime("%d.%m.%Y")
+
+
+def next_vaccination_due(vaccination_date: date, today: date | None = None) -> date:
+    # Ближайшая годовщина прививки, не раньше сегодняшнего дня
+    today = today or datetime.now(pytz.timezone('Europe/Moscow')).date()
+
+    years = 1
+    due = vaccination_date + relativedelta(years=years)
+    while due < today:
+        years += 1
+        due = vaccination_date + relativedelta(years=years)
+    return due
+
 
 class PetType(PyEnum):
     CAT = "кошка"
@@ -14,28 +58,291 @@ class User(Base):
     __tablename__ = 'users'
     id = Column(Integer, primary_key=True)
     telegram_id = Column(Integer, unique=True)
+    # False, если бот заблокирован или чат удалён; /start снова включает уведомления
+    is_active = Column(Boolean, default=True, server_default="1", nullable=False)
     pets = relationship("Pet", back_populates="owner")
 
 class Pet(Base):
     __tablename__ = 'pets'
     id = Column(Integer, primary_key=True)
-    name = Column(String)
+    name = Column(String, index=True)
     breed = Column(String, nullable=True)
     pet_type = Column(Enum(PetType))
-    vaccination_date = Column(String)
-    owner_id = Column(Integer, ForeignKey('users.id'))
+    vaccination_date = Column(Date, nullable=True)
+    # Дата следующей прививки, по ней ежедневный обход находит питомцев.
+    # Пусто, если напоминание о вакцинации не нужно.
+    next_vaccination_due = Column(Date, nullable=True, index=True)
+    owner_id = Column(Integer, ForeignKey('users.id'), index=True)
     owner = relationship("User", back_populates="pets")
     reminders = relationship("Reminder", back_populates="pet")
 
 class Reminder(Base):
     __tablename__ = 'reminders'
     id = Column(Integer, primary_key=True)
-    time = Column(String)
-    days = Column(String)
-    pet_id = Column(Integer, ForeignKey('pets.id'))
+    # Минуты от полуночи и битовая маска дней недели (бит 0 — понедельник)
+    minute_of_day = Column(Integer, index=True)
+    weekdays = Column(Integer)
+    pet_id = Column(Integer, ForeignKey('pets.id'), index=True)
     pet = relationship("Pet", back_populates="reminders")
     created_at = Column(DateTime, default=lambda: datetime.now(pytz.timezone('Europe/Moscow')))
 
-engine = create_engine('sqlite:///pets.db')
+class FSMRecord(Base):
+    # Состояние диалога пользователя, данные хранятся в JSON
+    __tablename__ = 'fsm_states'
+    key = Column(String, primary_key=True)
+    state = Column(String, nullable=True)
+    data = Column(Text, default="{}")
+
+class ShardLease(Base):
+    # Какой процесс рассылает уведомления пользователям шарда (telegram_id % SHARD_COUNT)
+    __tablename__ = 'shard_leases'
+    shard = Column(Integer, primary_key=True)
+    owner = Column(String, nullable=True)
+    expires_at = Column(Float, default=0)
+
+class ShardWorker(Base):
+    # Живые процессы, между ними шарды делятся поровну
+    __tablename__ = 'shard_workers'
+    worker_id = Column(String, primary_key=True)
+    expires_at = Column(Float)
+
+class TickState(Base):
+    # Последняя обработанная минута напоминаний (unix time): 'tick' или 'tick:<шард>',
+    # и полночь последнего дня обхода вакцинаций: 'vaccination_sweep' или 'vaccination_sweep:<шард>'
+    __tablename__ = 'tick_state'
+    key = Column(String, primary_key=True)
+    processed_at = Column(Float)
+
+class OutboxMessage(Base):
+    # Уведомление записывается сюда до отправки. После отправки next_attempt_at
+    # становится NULL, а строка хранится ещё сутки, чтобы повтор с тем же key не прошёл
+    __tablename__ = 'outbox'
+    id = Column(Integer, primary_key=True)
+    key = Column(String, unique=True)
+    chat_id = Column(Integer)
+    text = Column(Text)
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(Float, nullable=True, index=True)
+    created_at = Column(Float)
+
+DATABASE_PATH = os.getenv('DATABASE_PATH', 'pets.db')
+
+# Синхронный движок нужен для миграций и создания таблиц,
+# обработчики и рассылка работают через асинхронный
+engine = create_engine(f'sqlite:///{DATABASE_PATH}')
+migrate(engine)
 Base.metadata.create_all(engine)
-Session = sessionmaker(bind=engine)
\ No newline at end of file
+Session = sessionmaker(bind=engine)
+
+async_engine = create_async_engine(f'sqlite+aiosqlite:///{DATABASE_PATH}')
+AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+# Запросы, загружающие нужный граф объектов за фиксированное число SELECT,
+# независимо от количества питомцев и напоминаний
+
+async def get_user_pets(session, telegram_id: int) -> list[Pet]:
+    result = await session.scalars(
+        select(Pet)
+        .join(Pet.owner)
+        .where(User.telegram_id == telegram_id)
+        .order_by(Pet.id)
+    )
+    return list(result)
+
+
+async def get_user_reminders(session, telegram_id: int) -> list[Reminder]:
+    # Напоминания вместе с питомцем одним JOIN, Reminder.pet уже заполнен
+    result = await session.scalars(
+        select(Reminder)
+        .join(Reminder.pet)
+        .join(Pet.owner)
+        .options(contains_eager(Reminder.pet))
+        .where(User.telegram_id == telegram_id)
+        .order_by(Pet.id, Reminder.id)
+    )
+    return list(result)
+
+
+def _reminder_schedule_query():
+    return (
+        select(Reminder.id, Pet.id, Reminder.minute_of_day, Reminder.weekdays)
+        .join(Reminder.pet)
+        .join(Pet.owner)
+        .where(User.is_active.is_(True))
+    )
+
+
+async def get_reminder_schedule(session, reminder_id: int):
+    # (reminder_id, pet_id, minute_of_day, weekdays) или None
+    result = await session.execute(_reminder_schedule_query().where(Reminder.id == reminder_id))
+    return result.first()
+
+
+async def get_reminder_schedules(session):
+    result = await session.execute(_reminder_schedule_query())
+    return result.all()
+
+
+async def get_user_reminder_schedules(session, telegram_id: int):
+    result = await session.execute(_reminder_schedule_query().where(User.telegram_id == telegram_id))
+    return result.all()
+
+
+async def deactivate_user(session, telegram_id: int) -> list[int]:
+    # Помечает пользователя неактивным и снимает его неотправленные уведомления.
+    # Возвращает id напоминаний, которые нужно убрать из корзин
+    result = await session.execute(
+        update(User)
+        .where(User.telegram_id == telegram_id, User.is_active.is_(True))
+        .values(is_active=False)
+    )
+    if not result.rowcount:
+        return []
+    await session.execute(
+        update(OutboxMessage)
+        .where(OutboxMessage.chat_id == telegram_id, OutboxMessage.next_attempt_at.is_not(None))
+        .values(next_attempt_at=None)
+    )
+    reminder_ids = await session.execute(
+        select(Reminder.id).join(Reminder.pet).join(Pet.owner).where(User.telegram_id == telegram_id)
+    )
+    reminder_ids = list(reminder_ids.scalars())
+    await session.commit()
+    return reminder_ids
+
+
+async def get_inactive_user_ids(session) -> set[int]:
+    result = await session.scalars(select(User.telegram_id).where(User.is_active.is_(False)))
+    return set(result)
+
+
+async def is_user_active(session, telegram_id: int) -> bool | None:
+    # None — пользователя ещё нет в базе
+    return await session.scalar(select(User.is_active).where(User.telegram_id == telegram_id))
+
+
+async def reactivate_user(session, telegram_id: int) -> bool:
+    result = await session.execute(
+        update(User)
+        .where(User.telegram_id == telegram_id, User.is_active.is_(False))
+        .values(is_active=True)
+    )
+    await session.commit()
+    return bool(result.rowcount)
+
+
+def in_shards(shards):
+    # shards — (число шардов, номера своих шардов)
+    shard_count, owned = shards
+    return (User.telegram_id % shard_count).in_(list(owned))
+
+
+async def get_due_reminder_targets(session, weekday: int, minute_of_day: int, shards):
+    # (reminder_id, chat_id, pet_name) для напоминаний этой минуты у пользователей своих шардов
+    result = await session.execute(
+        select(Reminder.id, User.telegram_id, Pet.name)
+        .select_from(Reminder)
+        .join(Reminder.pet)
+        .join(Pet.owner)
+        .where(
+            Reminder.minute_of_day == minute_of_day,
+            Reminder.weekdays.op('&')(1 << weekday) != 0,
+            User.is_active.is_(True),
+            in_shards(shards)
+        )
+    )
+    return result.all()
+
+
+async def get_reminders_between(session, minute_ranges, shards=None):
+    # (reminder_id, chat_id, pet_name, minute_of_day, weekdays) для напоминаний, время
+    # которых попадает в один из отрезков minute_ranges [(от, до)] включительно
+    query = (
+        select(Reminder.id, User.telegram_id, Pet.name, Reminder.minute_of_day, Reminder.weekdays)
+        .select_from(Reminder)
+        .join(Reminder.pet)
+        .join(Pet.owner)
+        .where(
+            or_(*(Reminder.minute_of_day.between(low, high) for low, high in minute_ranges)),
+            User.is_active.is_(True)
+        )
+    )
+    if shards is not None:
+        query = query.where(in_shards(shards))
+    result = await session.execute(query)
+    return result.all()
+
+
+async def get_last_ticks(session, keys) -> dict[str, float]:
+    result = await session.execute(
+        select(TickState.key, TickState.processed_at).where(TickState.key.in_(list(keys)))
+    )
+    return dict(result.all())
+
+
+async def save_last_ticks(session, keys, processed_at: float):
+    statement = insert(TickState).values([{"key": key, "processed_at": processed_at} for key in keys])
+    await session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[TickState.key],
+            set_={"processed_at": statement.excluded.processed_at}
+        )
+    )
+    await session.commit()
+
+
+async def get_reminder_targets(session, reminder_ids, chunk_size: int = 500):
+    # (reminder_id, chat_id, pet_name) для напоминаний, которые сработали в эту минуту
+    reminder_ids = list(reminder_ids)
+    targets = []
+    for i in range(0, len(reminder_ids), chunk_size):
+        result = await session.execute(
+            select(Reminder.id, User.telegram_id, Pet.name)
+            .select_from(Reminder)
+            .join(Reminder.pet)
+            .join(Pet.owner)
+            .where(Reminder.id.in_(reminder_ids[i:i + chunk_size]), User.is_active.is_(True))
+        )
+        targets.extend(result.all())
+    return targets
+
+
+async def get_vaccinations_due(
+    session, due_dates, after_id: int = 0, limit: int = 500, shards=None, overdue_until: date | None = None
+):
+    # (pet_id, chat_id, pet_name, next_vaccination_due) порциями по индексу,
+    # следующая порция начинается после последнего pet_id.
+    # С overdue_until выбираются и все даты не позже него: их ещё не перенесли на следующий год
+    due = Pet.next_vaccination_due.in_(list(due_dates))
+    if overdue_until is not None:
+        due = or_(due, Pet.next_vaccination_due <= overdue_until)
+    query = (
+        select(Pet.id, User.telegram_id, Pet.name, Pet.next_vaccination_due)
+        .join(Pet.owner)
+        .where(due, Pet.id > after_id, User.is_active.is_(True))
+        .order_by(Pet.id)
+        .limit(limit)
+    )
+    if shards is not None:
+        query = query.where(in_shards(shards))
+    result = await session.execute(query)
+    return result.all()
+
+
+async def advance_vaccinations_due(session, today: date, shards=None) -> int:
+    # Прошедшие даты переносятся на следующую годовщину
+    query = select(Pet.id, Pet.next_vaccination_due).where(Pet.next_vaccination_due <= today)
+    if shards is not None:
+        query = query.join(Pet.owner).where(in_shards(shards))
+    result = await session.execute(query)
+    updates = []
+    for pet_id, due in result:
+        due += relativedelta(years=1)
+        while due <= today:
+            due += relativedelta(years=1)
+        updates.append({"id": pet_id, "next_vaccination_due": due})
+    if updates:
+        await session.execute(update(Pet), updates)
+        await session.commit()
+    return len(updates)
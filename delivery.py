@@ -0,0 +1,187 @@
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramRetryAfter,
+    TelegramNetworkError,
+    TelegramServerError,
+    TelegramForbiddenError,
+    TelegramBadRequest
+)
+from metrics import SENDS
+import asyncio
+import logging
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ограничения Telegram: около 30 сообщений в секунду на бота
+# и не больше одного сообщения в секунду в один чат
+DEFAULT_RATE = 30.0
+DEFAULT_CHAT_RATE = 1.0
+MAX_ATTEMPTS = 5
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def reserve(self) -> float:
+        # Забирает токен и возвращает, сколько секунд нужно подождать.
+        # Токены могут уйти в минус: это уже выданные очереди резервы.
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def is_idle(self) -> bool:
+        now = time.monotonic()
+        return self.tokens + (now - self.updated_at) * self.rate >= self.capacity
+
+
+class ChatUnavailable(Exception):
+    # Повторять отправку бессмысленно: бот заблокирован или чата больше нет
+    def __init__(self, chat_id: int):
+        super().__init__(f"Чат {chat_id} недоступен")
+        self.chat_id = chat_id
+
+
+def is_chat_unavailable(error: Exception) -> bool:
+    if isinstance(error, TelegramForbiddenError):
+        return True
+    return isinstance(error, TelegramBadRequest) and "chat not found" in str(error).lower()
+
+
+def _resolve(done: asyncio.Future | None, sent: bool):
+    if done is not None and not done.done():
+        done.set_result(sent)
+
+
+class SendQueue:
+    def __init__(
+        self,
+        bot: Bot,
+        workers: int = 8,
+        maxsize: int = 10000,
+        rate: float = DEFAULT_RATE,
+        chat_rate: float = DEFAULT_CHAT_RATE
+    ):
+        self.bot = bot
+        self.workers = workers
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.bucket = TokenBucket(rate, capacity=rate)
+        self.chat_rate = chat_rate
+        self.chat_buckets: dict[int, TokenBucket] = {}
+        self.paused_until = 0.0
+        self._tasks: list[asyncio.Task] = []
+        self._retries: set[asyncio.Task] = set()
+
+    async def put(self, chat_id: int, text: str, done: asyncio.Future | None = None):
+        # При заполненной очереди ждём, а не теряем сообщение.
+        # done получает True после отправки, False, если отправить не удалось,
+        # или исключение ChatUnavailable
+        await self.queue.put((chat_id, text, 1, done))
+
+    async def send(self, chat_id: int, text: str) -> bool:
+        done = asyncio.get_running_loop().create_future()
+        await self.put(chat_id, text, done)
+        return await done
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+            logger.info(f"Очередь отправки запущена, обработчиков: {self.workers}")
+
+    async def stop(self):
+        # Дожидаемся отправки того, что уже в очереди
+        if not self._tasks:
+            return
+        while True:
+            await self.queue.join()
+            if not self._retries:
+                break
+            await asyncio.gather(*self._retries, return_exceptions=True)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self.chat_buckets) > 10000:
+                self.chat_buckets = {
+                    key: value for key, value in self.chat_buckets.items() if not value.is_idle()
+                }
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.chat_rate, capacity=1)
+        return bucket
+
+    async def _wait_turn(self, chat_id: int):
+        pause = self.paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+        delay = max(self._chat_bucket(chat_id).reserve(), self.bucket.reserve())
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _worker(self):
+        while True:
+            chat_id, text, attempt, done = await self.queue.get()
+            try:
+                await self._wait_turn(chat_id)
+                await self.bot.send_message(chat_id=chat_id, text=text)
+                SENDS.inc("ok")
+                logger.info(f"Уведомление отправлено: {text}")
+                _resolve(done, True)
+            except TelegramRetryAfter as e:
+                SENDS.inc("flood")
+                # Флуд-контроль действует на весь бот, поэтому останавливаем все обработчики
+                logger.warning(f"Флуд-контроль Telegram, пауза {e.retry_after} с")
+                self.paused_until = max(self.paused_until, time.monotonic() + e.retry_after)
+                self._retry(chat_id, text, attempt, done, count_attempt=False)
+            except (TelegramNetworkError, TelegramServerError) as e:
+                SENDS.inc("retry")
+                logger.warning(f"Временная ошибка отправки в {chat_id}: {e}")
+                self._retry(chat_id, text, attempt, done, delay=2 ** attempt)
+            except Exception as e:
+                if is_chat_unavailable(e):
+                    SENDS.inc("blocked")
+                    logger.warning(f"Чат {chat_id} недоступен: {e}")
+                    if done is not None and not done.done():
+                        done.set_exception(ChatUnavailable(chat_id))
+                else:
+                    SENDS.inc("error")
+                    logger.error(f"Ошибка отправки уведомления: {e}")
+                    _resolve(done, False)
+            finally:
+                self.queue.task_done()
+
+    def _retry(
+        self,
+        chat_id: int,
+        text: str,
+        attempt: int,
+        done: asyncio.Future | None,
+        delay: float = 0.0,
+        count_attempt: bool = True
+    ):
+        if count_attempt:
+            if attempt >= MAX_ATTEMPTS:
+                SENDS.inc("error")
+                logger.error(f"Уведомление для {chat_id} не отправлено после {attempt} попыток")
+                _resolve(done, False)
+                return
+            attempt += 1
+
+        async def requeue():
+            if delay:
+                await asyncio.sleep(delay)
+            await self.queue.put((chat_id, text, attempt, done))
+
+        # Повтор ставится отдельной задачей, чтобы обработчик не блокировался на полной очереди
+        task = asyncio.create_task(requeue())
+        self._retries.add(task)
+        task.add_done_callback(self._retries.discard)
@@ -0,0 +1,155 @@
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.sqlite import insert
+from database import AsyncSession, FSMRecord
+from collections import OrderedDict
+from typing import Any
+import asyncio
+import json
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EMPTY_DATA = "{}"
+
+
+class SQLiteStorage(BaseStorage):
+    # Состояния FSM в таблице fsm_states. Последние записи держатся в LRU-кэше,
+    # изменения копятся и пишутся одной транзакцией раз в flush_interval секунд.
+    # flush_interval=0 пишет сразу, cache_size=0 читает из базы всё, что уже
+    # записано: так несколько процессов видят изменения друг друга.
+
+    def __init__(
+        self,
+        session_maker=AsyncSession,
+        key_builder: KeyBuilder | None = None,
+        cache_size: int = 10000,
+        flush_interval: float = 0.5
+    ):
+        self.session_maker = session_maker
+        self.key_builder = key_builder or DefaultKeyBuilder()
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+        # key -> (state, data в JSON)
+        self._cache: OrderedDict[str, tuple[str | None, str]] = OrderedDict()
+        self._dirty: set[str] = set()
+        self._flushing: set[str] = set()
+        self._flush_task: asyncio.Task | None = None
+        self._flush_lock = asyncio.Lock()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record_key = self.key_builder.build(key)
+        _, data = await self._load(record_key)
+        await self._store(record_key, (state.state if isinstance(state, State) else state, data))
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        state, _ = await self._load(self.key_builder.build(key))
+        return state
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        record_key = self.key_builder.build(key)
+        state, _ = await self._load(record_key)
+        # Сериализуем сразу, чтобы ошибка дошла до обработчика, а не до фоновой записи
+        await self._store(record_key, (state, json.dumps(data, ensure_ascii=False)))
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        _, data = await self._load(self.key_builder.build(key))
+        return json.loads(data)
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+
+    async def _load(self, key: str) -> tuple[str | None, str]:
+        record = self._cache.get(key)
+        if record is not None:
+            self._cache.move_to_end(key)
+            return record
+
+        async with self.session_maker() as session:
+            result = await session.execute(
+                select(FSMRecord.state, FSMRecord.data).where(FSMRecord.key == key)
+            )
+            row = result.first()
+
+        # Пока шёл запрос, запись могла измениться в кэше
+        if key in self._cache:
+            return self._cache[key]
+        record = (row.state, row.data) if row else (None, EMPTY_DATA)
+        self._remember(key, record)
+        return record
+
+    def _remember(self, key: str, record: tuple[str | None, str]):
+        self._cache[key] = record
+        self._cache.move_to_end(key)
+        self._trim()
+
+    def _trim(self):
+        # Вытесняются только записи, которые уже лежат в базе
+        while len(self._cache) > self.cache_size:
+            for old_key in self._cache:
+                if old_key not in self._dirty and old_key not in self._flushing:
+                    del self._cache[old_key]
+                    break
+            else:
+                break
+
+    async def _store(self, key: str, record: tuple[str | None, str]):
+        self._dirty.add(key)
+        self._remember(key, record)
+        if self.flush_interval <= 0:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.flush_interval)
+        finally:
+            if self._flush_task is asyncio.current_task():
+                self._flush_task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Ошибка записи состояний FSM: {e}")
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            self._flushing, self._dirty = self._dirty, set()
+
+            upserts = []
+            deletes = []
+            for key in self._flushing:
+                state, data = self._cache[key]
+                if state is None and data == EMPTY_DATA:
+                    deletes.append(key)
+                else:
+                    upserts.append({"key": key, "state": state, "data": data})
+
+            try:
+                async with self.session_maker() as session:
+                    if upserts:
+                        statement = insert(FSMRecord)
+                        await session.execute(
+                            statement.on_conflict_do_update(
+                                index_elements=[FSMRecord.key],
+                                set_={"state": statement.excluded.state, "data": statement.excluded.data}
+                            ),
+                            upserts
+                        )
+                    if deletes:
+                        await session.execute(delete(FSMRecord).where(FSMRecord.key.in_(deletes)))
+                    await session.commit()
+            except Exception:
+                # Не записанное попробуем ещё раз со следующей порцией
+                self._dirty |= self._flushing
+                raise
+            finally:
+                self._flushing = set()
+                self._trim()
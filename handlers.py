@@ -1,17 +1,30 @@
 from aiogram import Bot, Dispatcher, types, F
 from aiogram.filters import Command
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import CallbackQuery, Message, InlineKeyboardMarkup, InlineKeyboardButton
-from aiogram import Router
-from database import Session, User, Pet, PetType, Reminder
+from aiogram import Router, BaseMiddleware
+from database import (
+    AsyncSession, User, Pet, PetType, Reminder, EVERY_DAY,
+    parse_time, format_time, format_days, parse_date, format_date,
+    next_vaccination_due
+)
 from keyboards import *
+from content import get_breeds, is_known_breed, get_info_text
+from text_commands import TextCommands
+from metrics import HandlerMetrics
+from user_cache import get_pets, get_reminders, invalidate_user
 from notifications import (
-    scheduler,
     remove_reminder,
-    schedule_jobs,
-    schedule_vaccination_reminder
+    remove_pet_jobs,
+    schedule_reminder,
+    reactivate_chat,
+    ensure_chat_active
 )
+from sqlalchemy import select, delete
+from sqlalchemy.orm import joinedload
+from typing import Any, Awaitable, Callable
 import re
 import logging
 from datetime import datetime
@@ -21,6 +34,11 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = Router()
+# Кнопки меню маршрутизируются по словарю раньше фильтров роутера
+text_commands = TextCommands()
+router.message.outer_middleware(text_commands)
+router.message.middleware(HandlerMetrics())
+router.callback_query.middleware(HandlerMetrics())
 
 class Form(StatesGroup):
     pet_type = State()
@@ -37,7 +55,7 @@ class Form(StatesGroup):
     info_pet_type = State()
     info_category = State()
 
-@router.message(F.text == "🔙 Главное меню")
+@text_commands.command("🔙 Главное меню")
 async def back_to_main_menu(message: types.Message, state: FSMContext):
     await state.clear()
     # Убираем приветственное сообщение при возврате в главное меню
@@ -49,13 +67,17 @@ async def back_to_main_menu(message: types.Message, state: FSMContext):
 @router.message(Command("start"))
 async def start(message: types.Message, state: FSMContext):
     await state.clear()
+    try:
+        await reactivate_chat(message.from_user.id)
+    except Exception as e:
+        logger.error(f"Ошибка включения уведомлений: {e}")
     # Оставляем приветствие только для команды /start
     await message.answer(
         "🐕🦺 Добро пожаловать в PetCareBot!",
         reply_markup=get_main_menu()
     )
 
-@router.message(F.text == "ℹ️ О боте")
+@text_commands.command("ℹ️ О боте")
 async def about_bot(message: types.Message):
     text = (
         "🤖 <b>PetCareBot</b> - ваш персональный помощник по уходу за питомцами\n"
@@ -66,50 +88,71 @@ async def about_bot(message: types.Message):
     )
     await message.answer(text, reply_markup=get_main_menu())
 
-@router.message(F.text == "🐾 Профиль")
+def render_profile_page(pets: list[Pet], page: int):
+    # Один питомец на страницу, листание редактирует то же сообщение
+    page = min(max(page, 0), len(pets) - 1)
+    pet = pets[page]
+    text = f"🐾 <b>Ваши питомцы:</b>\n\n▪️ <b>{pet.name}</b> ({pet.pet_type.value})"
+    if pet.breed:
+        text += f", порода: {pet.breed}"
+    text += f"\n💉 Дата вакцинации: {format_date(pet.vaccination_date) if pet.vaccination_date else 'не указана'}"
+    return text, get_pet_management_keyboard(pet.id, page, len(pets))
+
+async def edit_message(message: Message, text: str, reply_markup=None):
+    try:
+        await message.edit_text(text, reply_markup=reply_markup)
+    except TelegramBadRequest as e:
+        # Повторное нажатие на текущую страницу ничего не меняет
+        if "message is not modified" not in str(e):
+            raise
+
+@text_commands.command("🐾 Профиль")
 async def profile(message: types.Message):
-    with Session() as session:
-        user = session.query(User).filter_by(telegram_id=message.from_user.id).first()
-        if not user or not user.pets:
-            await message.answer("У вас пока нет добавленных питомцев", reply_markup=get_main_menu())
-            return
-        await message.answer("🐾 <b>Ваши питомцы:</b>")
-        for pet in user.pets:
-            text = f"▪️ <b>{pet.name}</b> ({pet.pet_type.value})"
-            if pet.breed:
-                text += f", порода: {pet.breed}"
-            text += f"\n💉 Дата вакцинации: {pet.vaccination_date if pet.vaccination_date else 'не указана'}"
-            await message.answer(text, reply_markup=get_pet_management_keyboard(pet))
+    pets = await get_pets(message.from_user.id)
+    if not pets:
+        await message.answer("У вас пока нет добавленных питомцев", reply_markup=get_main_menu())
+        return
+    text, keyboard = render_profile_page(pets, 0)
+    await message.answer(text, reply_markup=keyboard)
+
+@router.callback_query(F.data.startswith("profile_page_"))
+async def profile_page_handler(query: CallbackQuery):
+    page = int(query.data.split("_")[2])
+    pets = await get_pets(query.from_user.id)
+    if not pets:
+        await edit_message(query.message, "У вас пока нет добавленных питомцев")
+    else:
+        await edit_message(query.message, *render_profile_page(pets, page))
+    await query.answer()
 
 @router.callback_query(F.data.startswith("delete_pet_"))
 async def delete_pet_handler(query: CallbackQuery):
     try:
-        pet_id = int(query.data.split("_")[2])
-        with Session() as session:
-            pet = session.query(Pet).filter_by(id=pet_id).first()
+        parts = query.data.split("_")
+        pet_id = int(parts[2])
+        page = int(parts[3]) if len(parts) > 3 else 0
+        async with AsyncSession() as session:
+            pet = await session.get(Pet, pet_id)
             if pet:
-                for reminder in pet.reminders:
-                    remove_reminder(reminder.id)
-                    session.delete(reminder)
+                remove_pet_jobs(pet.id)
+                await session.execute(delete(Reminder).where(Reminder.pet_id == pet.id))
                 pet_name = pet.name
-                session.delete(pet)
-                session.commit()
-                try:
-                    await query.message.delete()
-                except:
-                    pass
+                await session.delete(pet)
+                await session.commit()
+                invalidate_user(query.from_user.id)
+                pets = await get_pets(query.from_user.id)
+                if pets:
+                    await edit_message(query.message, *render_profile_page(pets, page))
+                else:
+                    await edit_message(query.message, "У вас пока нет добавленных питомцев")
                 await query.answer(f"✅ Питомец {pet_name} удален")
-                await query.message.answer(
-                    f"Питомец {pet_name} успешно удален",
-                    reply_markup=get_main_menu()
-                )
             else:
                 await query.answer("Питомец не найден")
     except Exception as e:
         logger.error(f"Ошибка при удалении: {e}")
         await query.answer("Ошибка при удалении")
 
-@router.message(F.text == "➕ Добавить питомца")
+@text_commands.command("➕ Добавить питомца")
 async def add_pet_start(message: types.Message, state: FSMContext):
     await message.answer(
         "🐾 Выберите тип питомца:",
@@ -119,10 +162,6 @@ async def add_pet_start(message: types.Message, state: FSMContext):
 
 @router.message(Form.pet_type)
 async def process_pet_type(message: types.Message, state: FSMContext):
-    if message.text == "🔙 Главное меню":
-        await back_to_main_menu(message, state)
-        return
-
     pet_type = None
     if message.text == "🐱 Кошка":
         pet_type = PetType.CAT
@@ -133,7 +172,8 @@ async def process_pet_type(message: types.Message, state: FSMContext):
         await message.answer("Пожалуйста, выберите тип из предложенных")
         return
 
-    await state.update_data(pet_type=pet_type)
+    # В состоянии хранятся только JSON-совместимые значения
+    await state.update_data(pet_type=pet_type.value)
     await message.answer(
         "✏️ Введите имя питомца:",
         reply_markup=get_back_button()
@@ -142,10 +182,6 @@ async def process_pet_type(message: types.Message, state: FSMContext):
 
 @router.message(Form.pet_name)
 async def process_pet_name(message: types.Message, state: FSMContext):
-    if message.text == "🔙 Главное меню":
-        await back_to_main_menu(message, state)
-        return
-
     if message.text == "🔙 Назад":
         await message.answer(
             "🐾 Выберите тип питомца:",
@@ -162,16 +198,12 @@ async def process_pet_name(message: types.Message, state: FSMContext):
     data = await state.get_data()
     await message.answer(
         "🔍 Выберите породу:",
-        reply_markup=get_breeds_keyboard(data["pet_type"].value)
+        reply_markup=get_breeds_keyboard(get_breeds(data["pet_type"], message.from_user.language_code))
     )
     await state.set_state(Form.pet_breed)
 
 @router.message(Form.pet_breed)
 async def process_pet_breed(message: types.Message, state: FSMContext):
-    if message.text == "🔙 Главное меню":
-        await back_to_main_menu(message, state)
-        return
-
     if message.text == "🔙 Назад":
         await message.answer(
             "✏️ Введите имя питомца:",
@@ -181,12 +213,9 @@ async def process_pet_breed(message: types.Message, state: FSMContext):
         return
 
     data = await state.get_data()
-    valid_breeds = {
-        "кошка": ["Британская", "Сиамская", "Мейн-кун"],
-        "собака": ["Лабрадор", "Овчарка", "Бульдог"]
-    }.get(data["pet_type"].value, [])
-
-    if message.text not in valid_breeds and message.text != "Другая порода":
+    if message.text != "Другая порода" and not is_known_breed(
+        data["pet_type"], message.text, message.from_user.language_code
+    ):
         await message.answer("Пожалуйста, выберите породу из предложенных")
         return
 
@@ -200,10 +229,6 @@ async def process_pet_breed(message: types.Message, state: FSMContext):
 
 @router.message(Form.vaccination_date)
 async def process_vaccination_date(message: types.Message, state: FSMContext):
-    if message.text == "🔙 Главное меню":
-        await back_to_main_menu(message, state)
-        return
-
     if message.text.lower() == "нет":
         await state.update_data(vaccination_date=None)
         data = await state.get_data()
@@ -266,43 +291,33 @@ async def handle_vaccination_choice(query: CallbackQuery, state: FSMContext):
                 vaccination_date = data.get("old_vaccination_date")
                 set_reminder = False
 
-        with Session() as session:
-            user = session.query(User).filter_by(telegram_id=query.from_user.id).first()
+        async with AsyncSession() as session:
+            user = await session.scalar(select(User).filter_by(telegram_id=query.from_user.id))
             if not user:
                 user = User(telegram_id=query.from_user.id)
                 session.add(user)
-                session.commit()
+                await session.commit()
 
             pet = Pet(
                 name=data["pet_name"],
                 breed=data["pet_breed"],
-                pet_type=data["pet_type"],
-                vaccination_date=vaccination_date,
-                owner=user
+                pet_type=PetType(data["pet_type"]),
+                vaccination_date=parse_date(vaccination_date) if vaccination_date else None,
+                owner_id=user.id
             )
+            if set_reminder and vaccination_date:
+                pet.next_vaccination_due = next_vaccination_due(pet.vaccination_date)
             session.add(pet)
-            session.commit()
+            await session.commit()
+            invalidate_user(query.from_user.id)
 
             if set_reminder and vaccination_date:
-                try:
-                    await schedule_vaccination_reminder(
-                        query.bot, pet.id, user.telegram_id,
-                        pet.name, vaccination_date
-                    )
-                    await query.message.answer(
-                        f"✅ Питомец {pet.name} добавлен!\n"
-                        f"Дата вакцинации: {vaccination_date}\n"
-                        f"Напоминание установлено",
-                        reply_markup=get_main_menu()
-                    )
-                except Exception as e:
-                    logger.error(f"Ошибка напоминания: {e}")
-                    await query.message.answer(
-                        f"✅ Питомец {pet.name} добавлен!\n"
-                        f"Дата вакцинации: {vaccination_date}\n"
-                        "Но напоминание не установлено из-за ошибки",
-                        reply_markup=get_main_menu()
-                    )
+                await query.message.answer(
+                    f"✅ Питомец {pet.name} добавлен!\n"
+                    f"Дата вакцинации: {vaccination_date}\n"
+                    f"Напоминание установлено на {format_date(pet.next_vaccination_due)}",
+                    reply_markup=get_main_menu()
+                )
             else:
                 await query.message.answer(
                     f"✅ Питомец {data['pet_name']} добавлен!\n"
@@ -322,22 +337,23 @@ async def handle_vaccination_choice(query: CallbackQuery, state: FSMContext):
         await state.clear()
 
 async def save_pet(message: types.Message, state: FSMContext, data: dict):
-    with Session() as session:
-        user = session.query(User).filter_by(telegram_id=message.from_user.id).first()
+    async with AsyncSession() as session:
+        user = await session.scalar(select(User).filter_by(telegram_id=message.from_user.id))
         if not user:
             user = User(telegram_id=message.from_user.id)
             session.add(user)
-            session.commit()
+            await session.commit()
 
         pet = Pet(
             name=data["pet_name"],
             breed=data["pet_breed"],
-            pet_type=data["pet_type"],
-            vaccination_date=data["vaccination_date"],
-            owner=user
+            pet_type=PetType(data["pet_type"]),
+            vaccination_date=parse_date(data["vaccination_date"]) if data["vaccination_date"] else None,
+            owner_id=user.id
         )
         session.add(pet)
-        session.commit()
+        await session.commit()
+        invalidate_user(message.from_user.id)
 
     await message.answer(
         f"✅ Питомец {data['pet_name']} успешно добавлен!",
@@ -358,20 +374,15 @@ async def edit_vaccination_start(query: CallbackQuery, state: FSMContext):
 
 @router.message(Form.edit_vaccination_date)
 async def process_edit_vaccination(message: types.Message, state: FSMContext):
-    if message.text == "🔙 Главное меню":
-        await back_to_main_menu(message, state)
-        return
-
     if message.text.lower() == "нет":
         data = await state.get_data()
-        with Session() as session:
-            pet = session.query(Pet).filter_by(id=data["pet_id"]).first()
+        async with AsyncSession() as session:
+            pet = await session.get(Pet, data["pet_id"])
             if pet:
                 pet.vaccination_date = None
-                session.commit()
-                for job in scheduler.get_jobs():
-                    if job.id.startswith(f"vacc_{pet.id}_"):
-                        scheduler.remove_job(job.id)
+                pet.next_vaccination_due = None
+                await session.commit()
+                invalidate_user(message.from_user.id)
                 await message.answer(
                     f"✅ Дата вакцинации для {pet.name} удалена",
                     reply_markup=get_main_menu()
@@ -419,38 +430,27 @@ async def process_edit_vaccination(message: types.Message, state: FSMContext):
 
 async def save_vaccination_date(message: types.Message, state: FSMContext, new_date: str):
     data = await state.get_data()
-    with Session() as session:
-        pet = session.query(Pet).filter_by(id=data["pet_id"]).first()
+    async with AsyncSession() as session:
+        pet = await session.get(Pet, data["pet_id"])
         if pet:
             old_date = pet.vaccination_date
-            pet.vaccination_date = new_date
-            session.commit()
-
-            try:
-                for job in scheduler.get_jobs():
-                    if job.id.startswith(f"vacc_{pet.id}_"):
-                        scheduler.remove_job(job.id)
-
-                await schedule_vaccination_reminder(
-                    message.bot, pet.id, pet.owner.telegram_id, pet.name, new_date
-                )
-
-                response = f"✅ Дата вакцинации для {pet.name} изменена"
-                if old_date:
-                    response += f":\nБыло: {old_date}\nСтало: {new_date}"
-                else:
-                    response += f"\nСтало: {new_date}"
-
-                await message.answer(response, reply_markup=get_main_menu())
+            pet.vaccination_date = parse_date(new_date)
+            pet.next_vaccination_due = next_vaccination_due(pet.vaccination_date)
+            await session.commit()
+            invalidate_user(message.from_user.id)
+
+            response = f"✅ Дата вакцинации для {pet.name} изменена"
+            if old_date:
+                response += f":\nБыло: {format_date(old_date)}\nСтало: {new_date}"
+            else:
+                response += f"\nСтало: {new_date}"
 
-            except Exception as e:
-                logger.error(f"Ошибка при обновлении напоминания: {e}")
-                await message.answer("❌ Ошибка при обновлении напоминания", reply_markup=get_main_menu())
+            await message.answer(response, reply_markup=get_main_menu())
         else:
             await message.answer("Питомец не найден")
     await state.clear()
 
-@router.message(F.text == "📚 Справка")
+@text_commands.command("📚 Справка")
 async def info_start(message: types.Message, state: FSMContext):
     await message.answer(
         "Выберите тип питомца:",
@@ -461,10 +461,6 @@ async def info_start(message: types.Message, state: FSMContext):
 
 @router.message(Form.info_pet_type)
 async def info_pet_type_selected(message: types.Message, state: FSMContext):
-    if message.text == "🔙 Главное меню":
-        await back_to_main_menu(message, state)
-        return
-
     if message.text not in ["🐱 Кошка", "🐶 Собака", "🔙 Назад"]:
         await message.answer("Пожалуйста, выберите тип из предложенных")
         return
@@ -487,10 +483,6 @@ async def info_pet_type_selected(message: types.Message, state: FSMContext):
 @router.message(Form.info_category)
 async def info_category_selected(message: types.Message, state: FSMContext):
     categories = ["🍽 Уход", "🎾 Игры", "💊 Здоровье", "🔙 Назад"]
-    if message.text == "🔙 Главное меню":
-        await back_to_main_menu(message, state)
-        return
-
     if message.text not in categories:
         await message.answer("Пожалуйста, выберите категорию из предложенных")
         return
@@ -502,63 +494,13 @@ async def info_category_selected(message: types.Message, state: FSMContext):
     data = await state.get_data()
     pet_type = data["info_pet_type"]
 
-    info_texts = {
-        "🐱 Кошка": {
-            "🍽 Уход": (
-                "🐱 <b>Уход за кошкой:</b>\n"
-                "• Кормление: 2-3 раза в день качественным кормом\n"
-                "• Вода: должна быть свежей\n"
-                "• Лоток: чистите ежедневно\n"
-                "• Шерсть: вычесывайте 1-2 раза в неделю\n"
-                "• Когти: подстригайте по необходимости"
-            ),
-            "🎾 Игры": (
-                "🐱 <b>Игры с кошкой:</b>\n"
-                "• Играйте 15-20 минут в день\n"
-                "• Используйте интерактивные игрушки\n"
-                "• Обеспечьте когтеточку\n"
-                "• Меняйте игрушки регулярно"
-            ),
-            "💊 Здоровье": (
-                "🐱 <b>Здоровье кошки:</b>\n"
-                "• Ежегодные прививки\n"
-                "• Обработка от паразитов\n"
-                "• Стерилизация/кастрация по рекомендации врача\n"
-                "• Регулярные осмотры у ветеринара"
-            )
-        },
-        "🐶 Собака": {
-            "🍽 Уход": (
-                "🐶 <b>Уход за собакой:</b>\n"
-                "• Кормление: 2 раза в день по режиму\n"
-                "• Прогулки: минимум 2-3 раза в день\n"
-                "• Купание: 1 раз в месяц или по необходимости\n"
-                "• Шерсть: регулярное вычесывание"
-            ),
-            "🎾 Игры": (
-                "🐶 <b>Игры с собакой:</b>\n"
-                "• Активные игры на улице\n"
-                "• Тренировки и обучение командам\n"
-                "• Игрушки для жевания\n"
-                "• Социализация с другими собаками"
-            ),
-            "💊 Здоровье": (
-                "🐶 <b>Здоровье собаки:</b>\n"
-                "• Ежегодные прививки\n"
-                "• Обработка от паразитов каждый месяц\n"
-                "• Стерилизация/кастрация по рекомендации\n"
-                "• Регулярные осмотры у ветеринара"
-            )
-        }
-    }
-
     await message.answer(
-        info_texts[pet_type][message.text],
+        get_info_text(pet_type, message.text, message.from_user.language_code) or "Раздел пока пуст",
         reply_markup=get_info_category_keyboard()
     )
 
 
-@router.message(F.text == "⏰ Напоминания")
+@text_commands.command("⏰ Напоминания")
 async def reminders_menu(message: types.Message, state: FSMContext):
     await state.clear()
     await message.answer(
@@ -567,54 +509,42 @@ async def reminders_menu(message: types.Message, state: FSMContext):
     )
 
 
-@router.message(F.text == "Добавить напоминание")
+@text_commands.command("Добавить напоминание", stateless=True)
 async def add_reminder_start(message: types.Message, state: FSMContext):
-    with Session() as session:
-        user = session.query(User).filter_by(telegram_id=message.from_user.id).first()
-        if not user or not user.pets:
-            await message.answer("Сначала добавьте питомца", reply_markup=get_main_menu())
-            return
-
-        pets_buttons = [[KeyboardButton(text=pet.name)] for pet in user.pets]
-        pets_buttons.append([KeyboardButton(text="🔙 Главное меню")])
+    pets = await get_pets(message.from_user.id)
+    if not pets:
+        await message.answer("Сначала добавьте питомца", reply_markup=get_main_menu())
+        return
 
-        await message.answer(
-            "Выберите питомца:",
-            reply_markup=ReplyKeyboardMarkup(keyboard=pets_buttons, resize_keyboard=True)
-        )
-        await state.set_state(Form.reminder_pet)
+    await message.answer(
+        "Выберите питомца:",
+        reply_markup=get_pets_keyboard(tuple(pet.name for pet in pets))
+    )
+    await state.set_state(Form.reminder_pet)
 
 
 @router.message(Form.reminder_pet)
 async def select_pet_for_reminder(message: types.Message, state: FSMContext):
-    if message.text == "🔙 Главное меню":
-        await back_to_main_menu(message, state)
-        return
-
     if message.text == "🔙 Назад":
         await reminders_menu(message, state)
         return
 
-    with Session() as session:
-        pet = session.query(Pet).filter_by(name=message.text).first()
-        if not pet:
-            await message.answer("Питомец не найден")
-            return
+    # Ищем только среди питомцев этого пользователя
+    pet = next((pet for pet in await get_pets(message.from_user.id) if pet.name == message.text), None)
+    if not pet:
+        await message.answer("Питомец не найден")
+        return
 
-        await state.update_data(pet_id=pet.id, pet_name=pet.name)
-        await message.answer(
-            "⏱ Введите время (ЧЧ:ММ):",
-            reply_markup=get_back_button()
-        )
-        await state.set_state(Form.reminder_time)
+    await state.update_data(pet_id=pet.id, pet_name=pet.name)
+    await message.answer(
+        "⏱ Введите время (ЧЧ:ММ):",
+        reply_markup=get_back_button()
+    )
+    await state.set_state(Form.reminder_time)
 
 
 @router.message(Form.reminder_time)
 async def set_reminder_time(message: types.Message, state: FSMContext):
-    if message.text == "🔙 Главное меню":
-        await back_to_main_menu(message, state)
-        return
-
     if message.text == "🔙 Назад":
         await add_reminder_start(message, state)
         return
@@ -631,32 +561,36 @@ async def set_reminder_time(message: types.Message, state: FSMContext):
     await state.set_state(Form.reminder_days)
 
 
+# Кнопки дней -> маска дней недели (бит 0 — понедельник)
+DAYS_MAP = {
+    "Пн": 1 << 0, "Вт": 1 << 1, "Ср": 1 << 2,
+    "Чт": 1 << 3, "Пт": 1 << 4, "Сб": 1 << 5, "Вс": 1 << 6,
+    "Ежедневно": EVERY_DAY
+}
+
+
 @router.message(Form.reminder_days)
 async def set_reminder_days(message: types.Message, state: FSMContext):
-    days_map = {
-        "Пн": "mon", "Вт": "tue", "Ср": "wed",
-        "Чт": "thu", "Пт": "fri", "Сб": "sat", "Вс": "sun",
-        "Ежедневно": "daily"
-    }
-    selected_day = days_map.get(message.text)
+    selected_day = DAYS_MAP.get(message.text)
 
     if not selected_day:
         await message.answer("Пожалуйста, выберите день из списка")
         return
 
     data = await state.get_data()
-    with Session() as session:
-        pet = session.query(Pet).filter_by(id=data["pet_id"]).first()
+    async with AsyncSession() as session:
+        pet = await session.get(Pet, data["pet_id"])
         reminder = Reminder(
-            time=data["reminder_time"],
-            days=selected_day,
-            pet=pet
+            minute_of_day=parse_time(data["reminder_time"]),
+            weekdays=selected_day,
+            pet_id=pet.id
         )
         session.add(reminder)
-        session.commit()
+        await session.commit()
+        invalidate_user(message.from_user.id)
 
         try:
-            await schedule_jobs(message.bot)
+            await schedule_reminder(reminder.id)
             await message.answer(
                 f"✅ Напоминание для {pet.name} установлено!",
                 reply_markup=get_main_menu()
@@ -671,35 +605,66 @@ async def set_reminder_days(message: types.Message, state: FSMContext):
     await state.clear()
 
 
-@router.message(F.text == "Мои напоминания")
+REMINDERS_PER_PAGE = 5
+
+def render_reminders_page(reminders: list[Reminder], page: int):
+    if not reminders:
+        return "🔔 У вас пока нет активных напоминаний", None
+
+    total = (len(reminders) + REMINDERS_PER_PAGE - 1) // REMINDERS_PER_PAGE
+    page = min(max(page, 0), total - 1)
+    start = page * REMINDERS_PER_PAGE
+    chunk = reminders[start:start + REMINDERS_PER_PAGE]
+
+    lines = ["🔔 Ваши текущие напоминания:"]
+    for number, reminder in enumerate(chunk, start=start + 1):
+        lines.append(
+            f"{number}. 🐾 {reminder.pet.name} в {format_time(reminder.minute_of_day)} "
+            f"({format_days(reminder.weekdays)})"
+        )
+    keyboard = get_reminder_actions_keyboard(tuple(reminder.id for reminder in chunk), page, total, start + 1)
+    return "\n".join(lines), keyboard
+
+async def refresh_reminders_list(message: Message, data: dict):
+    # Обновить список, из которого пользователь начал редактирование
+    if not data.get("list_message_id"):
+        return
+    reminders = await get_reminders(message.from_user.id)
+    text, keyboard = render_reminders_page(reminders, data.get("list_page", 0))
+    try:
+        await message.bot.edit_message_text(
+            text, chat_id=message.chat.id, message_id=data["list_message_id"], reply_markup=keyboard
+        )
+    except TelegramBadRequest as e:
+        logger.info(f"Список напоминаний не обновлён: {e}")
+
+@text_commands.command("Мои напоминания", stateless=True)
 async def show_reminders(message: types.Message):
-    with Session() as session:
-        user = session.query(User).filter_by(telegram_id=message.from_user.id).first()
-        if not user or not user.pets:
-            await message.answer("У вас нет напоминаний", reply_markup=get_main_menu())
-            return
+    reminders = await get_reminders(message.from_user.id)
+    if not reminders and not await get_pets(message.from_user.id):
+        await message.answer("У вас нет напоминаний", reply_markup=get_main_menu())
+        return
 
-        has_reminders = False
-        await message.answer("🔔 Ваши текущие напоминания:")
+    text, keyboard = render_reminders_page(reminders, 0)
+    await message.answer(text, reply_markup=keyboard)
 
-        for pet in user.pets:
-            if pet.reminders:
-                has_reminders = True
-                for reminder in pet.reminders:
-                    days = "ежедневно" if reminder.days == "daily" else ", ".join(reminder.days.split(", "))
-                    await message.answer(
-                        f"🐾 {pet.name} в {reminder.time} ({days})",
-                        reply_markup=get_reminder_actions_keyboard(reminder.id)
-                    )
 
-        if not has_reminders:
-            await message.answer("У вас пока нет активных напоминаний")
+@router.callback_query(F.data.startswith("reminders_page_"))
+async def reminders_page_handler(query: CallbackQuery):
+    page = int(query.data.split("_")[2])
+    reminders = await get_reminders(query.from_user.id)
+    await edit_message(query.message, *render_reminders_page(reminders, page))
+    await query.answer()
 
 
 @router.callback_query(F.data.startswith("edit_time_"))
 async def edit_reminder_time_handler(query: CallbackQuery, state: FSMContext):
-    reminder_id = int(query.data.split("_")[2])
-    await state.update_data(reminder_id=reminder_id)
+    parts = query.data.split("_")
+    await state.update_data(
+        reminder_id=int(parts[2]),
+        list_message_id=query.message.message_id,
+        list_page=int(parts[3]) if len(parts) > 3 else 0
+    )
     await query.message.answer(
         "Введите новое время (ЧЧ:ММ):",
         reply_markup=get_back_button()
@@ -710,10 +675,6 @@ async def edit_reminder_time_handler(query: CallbackQuery, state: FSMContext):
 
 @router.message(Form.edit_reminder_time)
 async def process_edit_time(message: types.Message, state: FSMContext):
-    if message.text == "🔙 Главное меню":
-        await back_to_main_menu(message, state)
-        return
-
     if message.text == "🔙 Назад":
         await state.clear()
         await show_reminders(message)
@@ -724,13 +685,15 @@ async def process_edit_time(message: types.Message, state: FSMContext):
         return
 
     data = await state.get_data()
-    with Session() as session:
-        reminder = session.query(Reminder).filter_by(id=data["reminder_id"]).first()
+    async with AsyncSession() as session:
+        reminder = await session.get(Reminder, data["reminder_id"])
         if reminder:
-            reminder.time = message.text
-            session.commit()
+            reminder.minute_of_day = parse_time(message.text)
+            await session.commit()
+            invalidate_user(message.from_user.id)
             try:
-                await schedule_jobs(message.bot)
+                await schedule_reminder(reminder.id)
+                await refresh_reminders_list(message, data)
                 await message.answer("✅ Время напоминания обновлено!", reply_markup=get_main_menu())
             except Exception as e:
                 logger.error(f"Ошибка обновления времени: {e}")
@@ -742,8 +705,12 @@ async def process_edit_time(message: types.Message, state: FSMContext):
 
 @router.callback_query(F.data.startswith("edit_days_"))
 async def edit_reminder_days_handler(query: CallbackQuery, state: FSMContext):
-    reminder_id = int(query.data.split("_")[2])
-    await state.update_data(reminder_id=reminder_id)
+    parts = query.data.split("_")
+    await state.update_data(
+        reminder_id=int(parts[2]),
+        list_message_id=query.message.message_id,
+        list_page=int(parts[3]) if len(parts) > 3 else 0
+    )
     await query.message.answer(
         "📅 Выберите новые дни:",
         reply_markup=get_days_keyboard()
@@ -754,25 +721,22 @@ async def edit_reminder_days_handler(query: CallbackQuery, state: FSMContext):
 
 @router.message(Form.edit_reminder_days)
 async def process_edit_days(message: types.Message, state: FSMContext):
-    days_map = {
-        "Пн": "mon", "Вт": "tue", "Ср": "wed",
-        "Чт": "thu", "Пт": "fri", "Сб": "sat", "Вс": "sun",
-        "Ежедневно": "daily"
-    }
-    selected_day = days_map.get(message.text)
+    selected_day = DAYS_MAP.get(message.text)
 
     if not selected_day:
         await message.answer("Пожалуйста, выберите день из списка")
         return
 
     data = await state.get_data()
-    with Session() as session:
-        reminder = session.query(Reminder).filter_by(id=data["reminder_id"]).first()
+    async with AsyncSession() as session:
+        reminder = await session.get(Reminder, data["reminder_id"])
         if reminder:
-            reminder.days = selected_day
-            session.commit()
+            reminder.weekdays = selected_day
+            await session.commit()
+            invalidate_user(message.from_user.id)
             try:
-                await schedule_jobs(message.bot)
+                await schedule_reminder(reminder.id)
+                await refresh_reminders_list(message, data)
                 await message.answer("✅ Дни напоминания обновлены!", reply_markup=get_main_menu())
             except Exception as e:
                 logger.error(f"Ошибка обновления дней: {e}")
@@ -784,29 +748,31 @@ async def process_edit_days(message: types.Message, state: FSMContext):
 
 @router.callback_query(F.data.startswith("delete_reminder_"))
 async def delete_reminder_handler(query: CallbackQuery):
-    reminder_id = int(query.data.split("_")[2])
-    with Session() as session:
-        reminder = session.query(Reminder).filter_by(id=reminder_id).first()
+    parts = query.data.split("_")
+    reminder_id = int(parts[2])
+    page = int(parts[3]) if len(parts) > 3 else 0
+    async with AsyncSession() as session:
+        reminder = await session.scalar(
+            select(Reminder).options(joinedload(Reminder.pet)).filter_by(id=reminder_id)
+        )
         if reminder:
             pet_name = reminder.pet.name
-            session.delete(reminder)
-            session.commit()
+            await session.delete(reminder)
+            await session.commit()
+            invalidate_user(query.from_user.id)
             remove_reminder(reminder_id)
-            await query.message.edit_text(
-                f"✅ Напоминание для {pet_name} удалено",
-                reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                    [InlineKeyboardButton(text="Вернуться к списку", callback_data="back_to_reminders")]
-                ])
-            )
-            await query.answer("Напоминание удалено")
+            reminders = await get_reminders(query.from_user.id)
+            await edit_message(query.message, *render_reminders_page(reminders, page))
+            await query.answer(f"✅ Напоминание для {pet_name} удалено")
         else:
             await query.answer("Напоминание не найдено")
 
 
 @router.callback_query(F.data == "back_to_reminders")
 async def back_to_reminders_handler(query: CallbackQuery):
-    await query.message.delete()
-    await show_reminders(query.message)
+    # Кнопка из старых сообщений: перерисовываем список на месте
+    reminders = await get_reminders(query.from_user.id)
+    await edit_message(query.message, *render_reminders_page(reminders, 0))
     await query.answer()
 
 
@@ -817,5 +783,24 @@ async def cancel_action_handler(query: CallbackQuery, state: FSMContext):
     await query.answer()
 
 
+class ReactivateChats(BaseMiddleware):
+    # Пользователь, разблокировавший бота, мог не нажать /start: включаем его
+    # напоминания до обработчика, иначе новые напоминания не сработают
+    async def __call__(
+        self,
+        handler: Callable[[Any, dict[str, Any]], Awaitable[Any]],
+        event: Any,
+        data: dict[str, Any]
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is not None:
+            try:
+                await ensure_chat_active(user.id)
+            except Exception as e:
+                logger.error(f"Ошибка включения уведомлений: {e}")
+        return await handler(event, data)
+
+
 def register_handlers(dp: Dispatcher, bot: Bot):
+    dp.update.outer_middleware(ReactivateChats())
     dp.include_router(router)
\ No newline at end of file
@@ -2,8 +2,14 @@ from aiogram.types import (
     ReplyKeyboardMarkup, KeyboardButton,
     InlineKeyboardMarkup, InlineKeyboardButton
 )
-from database import Pet
+from functools import cache, lru_cache
 
+# Разметка клавиатур — неизменяемые pydantic-объекты, поэтому их можно
+# собирать один раз и отдавать всем. Клавиатуры с параметрами хранятся
+# в LRU-кэше ограниченного размера.
+KEYBOARD_CACHE_SIZE = 1024
+
+@cache
 def get_yes_no_vaccination_keyboard():
     return InlineKeyboardMarkup(
         inline_keyboard=[
@@ -14,6 +20,7 @@ def get_yes_no_vaccination_keyboard():
         ]
     )
 
+@cache
 def get_main_menu():
     return ReplyKeyboardMarkup(
         keyboard=[
@@ -24,6 +31,7 @@ def get_main_menu():
         resize_keyboard=True
     )
 
+@cache
 def get_pet_type_keyboard():
     return ReplyKeyboardMarkup(
         keyboard=[
@@ -33,6 +41,7 @@ def get_pet_type_keyboard():
         resize_keyboard=True
     )
 
+@cache
 def get_info_pet_type_keyboard():
     return ReplyKeyboardMarkup(
         keyboard=[
@@ -42,6 +51,7 @@ def get_info_pet_type_keyboard():
         resize_keyboard=True
     )
 
+@cache
 def get_info_category_keyboard():
     return ReplyKeyboardMarkup(
         keyboard=[
@@ -52,12 +62,10 @@ def get_info_category_keyboard():
         resize_keyboard=True
     )
 
-def get_breeds_keyboard(pet_type: str):
-    breeds = {
-        "кошка": ["Британская", "Сиамская", "Мейн-кун"],
-        "собака": ["Лабрадор", "Овчарка", "Бульдог"]
-    }.get(pet_type, [])
-
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def get_breeds_keyboard(breeds: tuple[str, ...]):
+    # Породы приходят из content, ключ кэша — сам список, поэтому
+    # после перечитывания текстов клавиатура собирается заново
     buttons = [KeyboardButton(text=breed) for breed in breeds]
     buttons.append(KeyboardButton(text="Другая порода"))
     buttons.append(KeyboardButton(text="🔙 Назад"))
@@ -66,6 +74,7 @@ def get_breeds_keyboard(pet_type: str):
     keyboard = [buttons[i:i + 2] for i in range(0, len(buttons), 2)]
     return ReplyKeyboardMarkup(keyboard=keyboard, resize_keyboard=True)
 
+@cache
 def get_back_button():
     return ReplyKeyboardMarkup(
         keyboard=[
@@ -75,6 +84,7 @@ def get_back_button():
         resize_keyboard=True
     )
 
+@cache
 def get_reminder_options():
     return ReplyKeyboardMarkup(
         keyboard=[
@@ -84,6 +94,13 @@ def get_reminder_options():
         resize_keyboard=True
     )
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def get_pets_keyboard(pet_names: tuple[str, ...]):
+    keyboard = [[KeyboardButton(text=name)] for name in pet_names]
+    keyboard.append([KeyboardButton(text="🔙 Главное меню")])
+    return ReplyKeyboardMarkup(keyboard=keyboard, resize_keyboard=True)
+
+@cache
 def get_days_keyboard():
     return ReplyKeyboardMarkup(
         keyboard=[
@@ -95,33 +112,47 @@ def get_days_keyboard():
         resize_keyboard=True
     )
 
-def get_reminder_actions_keyboard(reminder_id: int):
-    return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(text="✏️ Время", callback_data=f"edit_time_{reminder_id}"),
-                InlineKeyboardButton(text="📅 Дни", callback_data=f"edit_days_{reminder_id}")
-            ],
-            [InlineKeyboardButton(text="🗑️ Удалить", callback_data=f"delete_reminder_{reminder_id}")]
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def get_reminder_actions_keyboard(reminder_ids: tuple[int, ...], page: int = 0, total: int = 1, start: int = 1):
+    # Строка кнопок на каждое напоминание страницы, номер совпадает с номером в тексте
+    keyboard = [
+        [
+            InlineKeyboardButton(text=f"✏️ {number}", callback_data=f"edit_time_{reminder_id}_{page}"),
+            InlineKeyboardButton(text=f"📅 {number}", callback_data=f"edit_days_{reminder_id}_{page}"),
+            InlineKeyboardButton(text=f"🗑️ {number}", callback_data=f"delete_reminder_{reminder_id}_{page}")
         ]
-    )
+        for number, reminder_id in enumerate(reminder_ids, start=start)
+    ]
+    if total > 1:
+        keyboard.append(get_pagination_row("reminders_page", page, total))
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
-def get_pet_management_keyboard(pet: Pet):
-    return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text="✏️ Изменить дату",
-                    callback_data=f"edit_vacc_{pet.id}"
-                ),
-                InlineKeyboardButton(
-                    text="🗑️ Удалить",
-                    callback_data=f"delete_pet_{pet.id}"
-                )
-            ]
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def get_pet_management_keyboard(pet_id: int, page: int = 0, total: int = 1):
+    keyboard = [
+        [
+            InlineKeyboardButton(
+                text="✏️ Изменить дату",
+                callback_data=f"edit_vacc_{pet_id}"
+            ),
+            InlineKeyboardButton(
+                text="🗑️ Удалить",
+                callback_data=f"delete_pet_{pet_id}_{page}"
+            )
         ]
-    )
+    ]
+    if total > 1:
+        keyboard.append(get_pagination_row("profile_page", page, total))
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+def get_pagination_row(prefix: str, page: int, total: int):
+    return [
+        InlineKeyboardButton(text="◀️", callback_data=f"{prefix}_{(page - 1) % total}"),
+        InlineKeyboardButton(text=f"{page + 1}/{total}", callback_data=f"{prefix}_{page}"),
+        InlineKeyboardButton(text="▶️", callback_data=f"{prefix}_{(page + 1) % total}")
+    ]
 
+@cache
 def get_cancel_keyboard():
     return InlineKeyboardMarkup(
         inline_keyboard=[
@@ -1,10 +1,21 @@
 import asyncio
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
+from aiogram.fsm.storage.memory import SimpleEventIsolation
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 from handlers import register_handlers
-from notifications import scheduler, schedule_jobs
+from notifications import scheduler, schedule_jobs, stop_notifications
+from database import engine, async_engine
+from delivery import SendQueue
+from fsm_storage import SQLiteStorage
+from sharding import ShardManager
+from metrics import instrument_engine, instrument_scheduler, start_metrics_server
 from dotenv import load_dotenv
+import user_cache
 import os
 import logging
 
@@ -13,21 +24,175 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 TOKEN = os.getenv('BOT_TOKEN')
+# Другой адрес Bot API, например benchmarks/fake_telegram.py для нагрузочных прогонов
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL')
+
+# polling, webhook или worker (только рассылка уведомлений, без приёма обновлений)
+RUN_MODE = os.getenv('RUN_MODE', 'polling')
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8080))
+
+# При SHARD_COUNT > 1 можно запустить несколько процессов с общей базой,
+# каждый рассылает уведомления только пользователям своих шардов.
+# При SHARD_COUNT = 1 бот работает только одним процессом: второй процесс
+# с той же базой (worker рядом с polling, несколько вебхуков) не запустится
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', 1))
+WORKER_ID = os.getenv('WORKER_ID')
+SHARD_LEASE_TTL = float(os.getenv('SHARD_LEASE_TTL', 30))
+
+# Напоминания, пропущенные пока бот не работал, досылаются при запуске
+# за последние CATCH_UP_HOURS часов; при CATCH_UP_SUMMARY=1 одним сообщением на пользователя
+CATCH_UP_HOURS = float(os.getenv('CATCH_UP_HOURS', 12))
+CATCH_UP_SUMMARY = os.getenv('CATCH_UP_SUMMARY', '1') == '1'
+
+# Кэш состояний FSM верен, только пока бот работает одним процессом. Несколько
+# процессов возможны только с шардами, тогда по умолчанию состояния читаются
+# из базы и пишутся в неё сразу
+MULTI_PROCESS = SHARD_COUNT > 1
+FSM_CACHE_SIZE = int(os.getenv('FSM_CACHE_SIZE', 0 if MULTI_PROCESS else 10000))
+FSM_FLUSH_INTERVAL = float(os.getenv('FSM_FLUSH_INTERVAL', 0 if MULTI_PROCESS else 0.5))
+# То же для кэша питомцев и напоминаний: 0 — читать из базы каждый раз
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', 0 if MULTI_PROCESS else 300))
+
+# Метрики Prometheus на http://METRICS_HOST:METRICS_PORT/metrics, 0 — выключены
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot):
+    if not WEBHOOK_URL:
+        raise RuntimeError("Для RUN_MODE=webhook нужен WEBHOOK_URL")
+
+    # Telegram получает ответ сразу, обновление обрабатывается отдельной задачей
+    async def on_startup(bot: Bot):
+        await bot.set_webhook(
+            f"{WEBHOOK_URL}{WEBHOOK_PATH}",
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=dp.resolve_used_update_types()
+        )
+        logger.info(f"Вебхук установлен: {WEBHOOK_URL}{WEBHOOK_PATH}")
+
+    dp.startup.register(on_startup)
+
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=WEBHOOK_SECRET,
+        handle_in_background=True
+    ).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+        logger.info(f"Сервер вебхука слушает {WEBHOOK_HOST}:{WEBHOOK_PORT}")
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+async def run_polling(dp: Dispatcher, bot: Bot):
+    # Если раньше бот работал через вебхук, getUpdates без его удаления не работает
+    await bot.delete_webhook()
+    await dp.start_polling(bot)
+
 
 async def main():
+    if RUN_MODE == 'worker' and SHARD_COUNT == 1:
+        raise RuntimeError("Для RUN_MODE=worker нужен SHARD_COUNT > 1")
+
+    metrics_runner = None
+    if METRICS_PORT:
+        instrument_engine(engine, "sync")
+        instrument_engine(async_engine.sync_engine, "async")
+        instrument_scheduler(scheduler)
+        metrics_runner = await start_metrics_server(METRICS_HOST, METRICS_PORT)
+
+    session = None
+    if TELEGRAM_API_URL:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL))
     bot = Bot(
         token=TOKEN,
+        session=session,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
-    dp = Dispatcher()
+    user_cache.configure(USER_CACHE_TTL)
+    # Состояния диалогов переживают перезапуск бота
+    storage = SQLiteStorage(cache_size=FSM_CACHE_SIZE, flush_interval=FSM_FLUSH_INTERVAL)
+    # Обновления обрабатываются параллельно, но по одному на пользователя
+    dp = Dispatcher(storage=storage, events_isolation=SimpleEventIsolation())
 
     register_handlers(dp, bot)
 
-    await schedule_jobs(bot)
+    send_queue = SendQueue(
+        bot,
+        workers=int(os.getenv('SEND_WORKERS', 8)),
+        maxsize=int(os.getenv('SEND_QUEUE_SIZE', 10000)),
+        rate=float(os.getenv('SEND_RATE', 30)),
+        chat_rate=float(os.getenv('SEND_CHAT_RATE', 1))
+    )
+    send_queue.start()
+
+    shards = None
+    instance_lock = None
+    if SHARD_COUNT > 1:
+        shards = ShardManager(
+            SHARD_COUNT,
+            worker_id=WORKER_ID,
+            lease_ttl=SHARD_LEASE_TTL,
+            heartbeat_interval=SHARD_LEASE_TTL / 3
+        )
+        await shards.start()
+    else:
+        # Без шардов корзины напоминаний живут в памяти процесса, а общие задачи
+        # планировщика и outbox выполнил бы каждый процесс: уведомления ушли бы дважды.
+        # Аренда единственного шарда не даёт запустить второй процесс
+        instance_lock = ShardManager(
+            1,
+            worker_id=WORKER_ID,
+            lease_ttl=SHARD_LEASE_TTL,
+            heartbeat_interval=SHARD_LEASE_TTL / 3
+        )
+        await instance_lock.start()
+        if not await instance_lock.wait_for_shards(SHARD_LEASE_TTL * 4 / 3):
+            await instance_lock.stop()
+            await send_queue.stop()
+            raise RuntimeError("Бот уже запущен другим процессом, для нескольких процессов нужен SHARD_COUNT > 1")
+
+    await schedule_jobs(
+        bot,
+        send_queue,
+        shards,
+        catch_up_hours=CATCH_UP_HOURS,
+        catch_up_summary=CATCH_UP_SUMMARY
+    )
     if not scheduler.running:
         scheduler.start()
 
-    await dp.start_polling(bot)
+    try:
+        if RUN_MODE == 'webhook':
+            await run_webhook(dp, bot)
+        elif RUN_MODE == 'worker':
+            logger.info("Процесс только рассылает уведомления")
+            await asyncio.Event().wait()
+        else:
+            await run_polling(dp, bot)
+    finally:
+        scheduler.shutdown(wait=False)
+        await stop_notifications()
+        await send_queue.stop()
+        if shards is not None:
+            await shards.stop()
+        if instance_lock is not None:
+            await instance_lock.stop()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await async_engine.dispose()
 
 if __name__ == '__main__':
     try:
@@ -0,0 +1,190 @@
+from aiogram import BaseMiddleware
+from aiohttp import web
+from apscheduler.events import EVENT_JOB_SUBMITTED, EVENT_JOB_EXECUTED, EVENT_JOB_ERROR, EVENT_JOB_MISSED
+from sqlalchemy import event
+from bisect import bisect_left
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable
+import logging
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Метрики в текстовом формате Prometheus, отдаются по /metrics.
+# Счётчики живут в памяти процесса и обнуляются при перезапуске.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LAG_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300)
+
+_registry: list = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.values: dict[tuple, float] = {}
+        _registry.append(self)
+
+    def inc(self, *label_values, amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # label_values -> [счётчики по корзинам (последняя — +Inf), сумма]
+        self.values: dict[tuple, list] = {}
+        _registry.append(self)
+
+    def observe(self, seconds: float, *label_values):
+        value = self.values.get(label_values)
+        if value is None:
+            value = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        value[0][bisect_left(self.buckets, seconds)] += 1
+        value[1] += seconds
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                labels = _format_labels(self.labels, label_values, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+HANDLER_SECONDS = Histogram(
+    "petcare_handler_seconds", "Время обработки обновления", ("handler",)
+)
+HANDLER_ERRORS = Counter(
+    "petcare_handler_errors_total", "Обработчики, завершившиеся исключением", ("handler",)
+)
+DB_QUERIES = Counter(
+    "petcare_db_queries_total", "SQL-запросы", ("engine", "statement")
+)
+DB_QUERY_SECONDS = Histogram(
+    "petcare_db_query_seconds", "Время SQL-запроса", ("engine", "statement")
+)
+DB_ERRORS = Counter(
+    "petcare_db_errors_total", "SQL-запросы с ошибкой", ("engine",)
+)
+SCHEDULER_JOBS = Counter(
+    "petcare_scheduler_jobs_total", "Запуски задач планировщика", ("job", "result")
+)
+SCHEDULER_LAG_SECONDS = Histogram(
+    "petcare_scheduler_lag_seconds", "Опоздание запуска задачи относительно расписания", ("job",), LAG_BUCKETS
+)
+SENDS = Counter(
+    "petcare_sends_total", "Отправки уведомлений по результату: ok, error, flood, retry, blocked", ("result",)
+)
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def observe_handler(name: str, started: float, failed: bool = False):
+    HANDLER_SECONDS.observe(time.perf_counter() - started, name)
+    if failed:
+        HANDLER_ERRORS.inc(name)
+
+
+class HandlerMetrics(BaseMiddleware):
+    # Внутренний middleware: к этому моменту фильтры уже выбрали обработчик
+    async def __call__(
+        self,
+        handler: Callable[[Any, dict[str, Any]], Awaitable[Any]],
+        event: Any,
+        data: dict[str, Any]
+    ) -> Any:
+        handler_object = data.get("handler")
+        name = handler_object.callback.__name__ if handler_object is not None else "unknown"
+        started = time.perf_counter()
+        try:
+            result = await handler(event, data)
+        except Exception:
+            observe_handler(name, started, failed=True)
+            raise
+        observe_handler(name, started)
+        return result
+
+
+def instrument_engine(engine, name: str):
+    # Для асинхронного движка передаётся его sync_engine
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        kind = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        DB_QUERIES.inc(name, kind)
+        DB_QUERY_SECONDS.observe(time.perf_counter() - started, name, kind)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        DB_ERRORS.inc(name)
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+
+def instrument_scheduler(scheduler):
+    def on_event(scheduler_event):
+        job_id = scheduler_event.job_id
+        if scheduler_event.code == EVENT_JOB_SUBMITTED:
+            scheduled = scheduler_event.scheduled_run_times[-1]
+            lag = (datetime.now(timezone.utc) - scheduled).total_seconds()
+            SCHEDULER_LAG_SECONDS.observe(max(lag, 0.0), job_id)
+        elif scheduler_event.code == EVENT_JOB_EXECUTED:
+            SCHEDULER_JOBS.inc(job_id, "ok")
+        elif scheduler_event.code == EVENT_JOB_ERROR:
+            SCHEDULER_JOBS.inc(job_id, "error")
+        elif scheduler_event.code == EVENT_JOB_MISSED:
+            SCHEDULER_JOBS.inc(job_id, "missed")
+
+    scheduler.add_listener(on_event, EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED)
+
+
+async def _handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(text=render(), content_type="text/plain", charset="utf-8")
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    app = web.Application()
+    app.router.add_get("/metrics", _handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Метрики доступны на http://{host}:{port}/metrics")
+    return runner
@@ -0,0 +1,132 @@
+from datetime import date, datetime
+from dateutil.relativedelta import relativedelta
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Версия схемы хранится в PRAGMA user_version. Каждый шаг переводит базу
+# на следующую версию и ничего не делает, если таблиц ещё нет: новая база
+# сразу создаётся по актуальным моделям через create_all.
+
+CRON_WEEKDAYS = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+
+
+def _columns(connection, table: str) -> set[str]:
+    return {row[1] for row in connection.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+
+def _days_to_mask(days: str) -> int:
+    if days == "daily":
+        return 0b1111111
+    mask = 0
+    for day in days.split(","):
+        mask |= 1 << CRON_WEEKDAYS[day.strip()]
+    return mask
+
+
+def _typed_schema(connection):
+    # Строковые даты, время и дни -> Date, минуты от полуночи и маска дней,
+    # плюс индексы по внешним ключам и имени питомца
+    if _columns(connection, "pets"):
+        connection.exec_driver_sql(
+            "UPDATE pets SET vaccination_date = "
+            "substr(vaccination_date, 7, 4) || '-' || substr(vaccination_date, 4, 2) || '-' || substr(vaccination_date, 1, 2) "
+            "WHERE vaccination_date LIKE '__.__.____'"
+        )
+        connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_pets_owner_id ON pets (owner_id)")
+        connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_pets_name ON pets (name)")
+
+    reminder_columns = _columns(connection, "reminders")
+    if "time" in reminder_columns:
+        connection.exec_driver_sql("ALTER TABLE reminders ADD COLUMN minute_of_day INTEGER")
+        connection.exec_driver_sql("ALTER TABLE reminders ADD COLUMN weekdays INTEGER")
+
+        rows = connection.exec_driver_sql("SELECT id, time, days FROM reminders").fetchall()
+        updates = []
+        for reminder_id, time, days in rows:
+            try:
+                hour, minute = map(int, time.split(':'))
+                updates.append((hour * 60 + minute, _days_to_mask(days), reminder_id))
+            except Exception as e:
+                logger.error(f"Напоминание {reminder_id} не перенесено: {e}")
+        if updates:
+            connection.exec_driver_sql(
+                "UPDATE reminders SET minute_of_day = ?, weekdays = ? WHERE id = ?", updates
+            )
+
+        connection.exec_driver_sql("ALTER TABLE reminders DROP COLUMN time")
+        connection.exec_driver_sql("ALTER TABLE reminders DROP COLUMN days")
+        logger.info(f"Перенесено напоминаний: {len(updates)} из {len(rows)}")
+    if reminder_columns:
+        connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_reminders_pet_id ON reminders (pet_id)")
+
+
+def _vaccination_due(connection):
+    # Дата следующей прививки хранится в питомце, вместо отдельной задачи на каждого
+    pet_columns = _columns(connection, "pets")
+    if not pet_columns:
+        return
+    if "next_vaccination_due" not in pet_columns:
+        connection.exec_driver_sql("ALTER TABLE pets ADD COLUMN next_vaccination_due DATE")
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_pets_next_vaccination_due ON pets (next_vaccination_due)"
+    )
+
+    today = datetime.now().date()
+    rows = connection.exec_driver_sql(
+        "SELECT id, vaccination_date FROM pets WHERE vaccination_date IS NOT NULL"
+    ).fetchall()
+    updates = []
+    for pet_id, vaccination_date in rows:
+        try:
+            vaccination_date = date.fromisoformat(vaccination_date)
+            years = 1
+            due = vaccination_date + relativedelta(years=years)
+            while due < today:
+                years += 1
+                due = vaccination_date + relativedelta(years=years)
+            updates.append((due.isoformat(), pet_id))
+        except Exception as e:
+            logger.error(f"Дата вакцинации питомца {pet_id} не перенесена: {e}")
+    if updates:
+        connection.exec_driver_sql("UPDATE pets SET next_vaccination_due = ? WHERE id = ?", updates)
+    logger.info(f"Даты следующей вакцинации заполнены: {len(updates)}")
+
+
+def _reminder_minute_index(connection):
+    # Тик в режиме шардов выбирает напоминания минуты прямо из базы
+    if _columns(connection, "reminders"):
+        connection.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_reminders_minute_of_day ON reminders (minute_of_day)"
+        )
+
+
+def _user_is_active(connection):
+    # Пользователи, заблокировавшие бота, помечаются неактивными и пропускаются рассылкой
+    user_columns = _columns(connection, "users")
+    if user_columns and "is_active" not in user_columns:
+        connection.exec_driver_sql("ALTER TABLE users ADD COLUMN is_active BOOLEAN NOT NULL DEFAULT 1")
+
+
+def _drop_scheduler_jobs(connection):
+    # Задачи планировщика больше не хранятся в базе, их заводит каждый запуск
+    connection.exec_driver_sql("DROP TABLE IF EXISTS apscheduler_jobs")
+
+
+MIGRATIONS = [
+    _typed_schema,
+    _vaccination_due,
+    _reminder_minute_index,
+    _user_is_active,
+    _drop_scheduler_jobs,
+]
+
+
+def migrate(engine):
+    with engine.begin() as connection:
+        version = connection.exec_driver_sql("PRAGMA user_version").scalar()
+        for number, step in enumerate(MIGRATIONS[version:], start=version + 1):
+            logger.info(f"Миграция базы до версии {number}: {step.__name__}")
+            step(connection)
+            connection.exec_driver_sql(f"PRAGMA user_version = {number}")
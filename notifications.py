@@ -1,113 +1,574 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.jobstores.memory import MemoryJobStore
 from aiogram import Bot
-from database import Session, Reminder, Pet
+from aiogram.exceptions import TelegramRetryAfter
+from delivery import SendQueue, ChatUnavailable, is_chat_unavailable
+from outbox import Outbox
+from metrics import SENDS
+from sharding import ShardManager
+from database import (
+    AsyncSession,
+    get_reminder_schedule,
+    get_reminder_schedules,
+    get_reminder_targets,
+    get_due_reminder_targets,
+    get_vaccinations_due,
+    advance_vaccinations_due,
+    get_reminders_between,
+    get_user_reminder_schedules,
+    deactivate_user,
+    reactivate_user,
+    get_inactive_user_ids,
+    is_user_active,
+    get_last_ticks,
+    save_last_ticks,
+    format_time,
+    WEEKDAY_NAMES
+)
 import pytz
-import uuid
 import logging
-from datetime import datetime, timedelta
-from dateutil.relativedelta import relativedelta
+import time
+from datetime import datetime, date, timedelta
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-scheduler = AsyncIOScheduler(timezone="Europe/Moscow")
+TIMEZONE = pytz.timezone("Europe/Moscow")
 
+# Задач всего две, тик и обход вакцинаций, schedule_jobs заводит их при каждом
+# запуске, а пройденное ими хранится в tick_state. Поэтому задачи живут в памяти:
+# синхронная запись задач в базу из цикла событий блокировала бы его, пока
+# асинхронный движок держит транзакцию
+scheduler = AsyncIOScheduler(jobstores={"default": MemoryJobStore()}, timezone=TIMEZONE)
 
-async def send_notification(bot: Bot, chat_id: int, message: str):
+# Задачи планировщика получают бота отсюда
+_bot: Bot | None = None
+_send_queue: SendQueue | None = None
+# Если задан, процесс рассылает уведомления только пользователям своих шардов
+_shards: ShardManager | None = None
+
+# Все уведомления проходят через таблицу outbox, см. outbox.py
+_outbox: Outbox | None = None
+
+# Напоминания о кормлении не заводят отдельных задач. Раз в минуту
+# срабатывает одна задача TICK_JOB_ID и берёт готовую корзину
+# (день недели, минута суток) -> {reminder_id}.
+TICK_JOB_ID = "tick"
+
+_buckets: dict[tuple[int, int], set[int]] = {}
+_reminder_slots: dict[int, list[tuple[int, int]]] = {}
+_pet_reminders: dict[int, set[int]] = {}
+_reminder_pets: dict[int, int] = {}
+
+# Прививки тоже не заводят задач на каждого питомца: раз в день обход
+# находит по индексу питомцев, у которых до прививки осталось
+# столько дней, сколько указано в VACCINATION_NOTICE_DAYS. Последний
+# обработанный день хранится в tick_state, пропущенные дни досылаются
+VACCINATION_SWEEP_JOB_ID = "vaccination_sweep"
+VACCINATION_SWEEP_HOUR = 9
+VACCINATION_NOTICE_DAYS = (30, 7, 0)
+VACCINATION_BATCH_SIZE = 500
+
+# Пользователь, приостановленный из-за блокировки бота, включается снова при любом
+# входящем обновлении. Без шардов все отключения проходят через этот процесс,
+# и приостановленные известны по _suspended без запросов. С шардами отключает
+# владелец шарда, поэтому is_active читается из базы не чаще раза в ACTIVE_CHECK_TTL
+_suspended: set[int] = set()
+ACTIVE_CHECK_TTL = 300
+_checked_active: dict[int, float] = {}
+CHECKED_ACTIVE_SIZE = 10000
+
+# Последняя обработанная минута хранится в базе. При запуске напоминания,
+# пропущенные пока бот не работал, досылаются одним проходом, но не старше
+# CATCH_UP_HOURS: так восстановление занимает предсказуемое время
+CATCH_UP_HOURS = 12
+_catch_up_hours = CATCH_UP_HOURS
+_catch_up_summary = True
+_last_ticks: dict[str, float] = {}
+# Шарды, которые процесс уже тикает. Перешедшие к нему шарды сначала догоняются
+# с тика, сохранённого прежним владельцем
+_ticked_shards: frozenset[int] = frozenset()
+
+
+async def send_notification(bot: Bot, chat_id: int, message: str) -> bool:
+    # Ошибки логируются, кроме недоступного чата: о нём сообщает ChatUnavailable
     try:
         await bot.send_message(chat_id=chat_id, text=message)
+        SENDS.inc("ok")
         logger.info(f"Уведомление отправлено: {message}")
+        return True
+    except TelegramRetryAfter as e:
+        SENDS.inc("flood")
+        logger.error(f"Флуд-контроль Telegram, уведомление не отправлено: {e}")
     except Exception as e:
+        if is_chat_unavailable(e):
+            SENDS.inc("blocked")
+            raise ChatUnavailable(chat_id) from e
+        SENDS.inc("error")
         logger.error(f"Ошибка отправки уведомления: {e}")
+    return False
 
 
-async def schedule_vaccination_reminder(bot: Bot, pet_id: int, chat_id: int, pet_name: str, vaccination_date: str):
+async def _send(chat_id: int, message: str) -> bool:
+    # С очередью отправка идёт с учётом лимитов Telegram, без неё напрямую
     try:
-        for job in scheduler.get_jobs():
-            if job.id and job.id.startswith(f"vacc_{pet_id}_"):
-                scheduler.remove_job(job.id)
+        if _send_queue is not None:
+            return await _send_queue.send(chat_id, message)
+        return await send_notification(_bot, chat_id, message)
+    except ChatUnavailable:
+        await deactivate_chat(chat_id)
+        # Уведомление больше не повторяется, для outbox оно обработано
+        return True
 
-        if not vaccination_date:
-            return
 
-        day, month, year = map(int, vaccination_date.split('.'))
-        vacc_date = datetime(year, month, day).date()
-        today = datetime.now().date()
+async def deactivate_chat(telegram_id: int):
+    # Одним проходом: пользователь неактивен, его напоминания убраны из корзин,
+    # неотправленные уведомления сняты
+    _checked_active.pop(telegram_id, None)
+    _suspended.add(telegram_id)
+    try:
+        async with AsyncSession() as session:
+            reminder_ids = await deactivate_user(session, telegram_id)
+        for reminder_id in reminder_ids:
+            _unbucket_reminder(reminder_id)
+        logger.warning(
+            f"Пользователь {telegram_id} недоступен, напоминания приостановлены: {len(reminder_ids)}"
+        )
+    except Exception as e:
+        logger.error(f"Ошибка отключения пользователя {telegram_id}: {e}")
 
-        next_vacc_date = vacc_date + relativedelta(years=1)
 
-        if next_vacc_date <= today:
-            next_vacc_date = today + relativedelta(years=1)
+async def reactivate_chat(telegram_id: int) -> bool:
+    # Пользователь снова написал боту: возвращаем его напоминания в корзины
+    async with AsyncSession() as session:
+        if not await reactivate_user(session, telegram_id):
+            _suspended.discard(telegram_id)
+            return False
+        rows = await get_user_reminder_schedules(session, telegram_id) if _shards is None else []
 
-        message = f"⏰ {pet_name}, пора на ежегодную вакцинацию!"
-        job_id = f"vacc_{pet_id}_{uuid.uuid4().hex[:4]}"
+    _suspended.discard(telegram_id)
+    for row in rows:
+        _bucket_reminder(*row)
+    logger.info(f"Пользователь {telegram_id} снова активен, напоминаний: {len(rows)}")
+    return True
 
-        scheduler.add_job(
-            send_notification,
-            'date',
-            run_date=datetime(
-                next_vacc_date.year,
-                next_vacc_date.month,
-                next_vacc_date.day,
-                9, 0  # В 9:00 утра
-            ),
-            args=[bot, chat_id, message],
-            id=job_id,
-            misfire_grace_time=3600
+
+async def ensure_chat_active(telegram_id: int):
+    # Пишет в базу, только если пользователь действительно приостановлен
+    if _shards is None:
+        if telegram_id in _suspended:
+            await reactivate_chat(telegram_id)
+        return
+
+    now = time.monotonic()
+    if now - _checked_active.get(telegram_id, float('-inf')) < ACTIVE_CHECK_TTL:
+        return
+    _checked_active[telegram_id] = now
+    if len(_checked_active) > CHECKED_ACTIVE_SIZE:
+        for old_id, checked_at in list(_checked_active.items()):
+            if now - checked_at >= ACTIVE_CHECK_TTL:
+                del _checked_active[old_id]
+    async with AsyncSession() as session:
+        is_active = await is_user_active(session, telegram_id)
+    if is_active is False:
+        await reactivate_chat(telegram_id)
+
+
+async def _notify(rows: list[tuple[str, int, str]]):
+    # rows — (key, chat_id, text); key защищает от повторной записи того же уведомления
+    await _outbox.add(rows)
+
+
+async def flush_notifications():
+    # Отправить накопленные уведомления сразу и дождаться ответа Telegram
+    if _outbox is not None:
+        await _outbox.flush()
+
+
+async def stop_notifications():
+    global _outbox
+    if _outbox is not None:
+        await _outbox.stop()
+        _outbox = None
+
+
+def _vaccination_message(pet_name: str, days_left: int) -> str:
+    if days_left == 0:
+        return f"⏰ {pet_name}, пора на ежегодную вакцинацию!"
+    return f"💉 Через {days_left} дн. у {pet_name} ежегодная вакцинация"
+
+
+def _state_keys(prefix: str) -> dict[str, tuple | None]:
+    # Ключ состояния в tick_state -> фильтр шардов: один ключ без шардов или по ключу на свой шард
+    if _shards is None:
+        return {prefix: None}
+    shard_count, owned = _shards.shards
+    return {f"{prefix}:{shard}": (shard_count, {shard}) for shard in owned}
+
+
+def _vaccination_days_left(first: date, until: date, today: date) -> dict[date, int]:
+    # Даты прививок, о которых надо было напомнить в дни с first по until, -> сколько дней осталось сегодня.
+    # Даты не позже until выбираются отдельно как просроченные
+    days_left = {}
+    for offset in range((until - first).days + 1):
+        for days in VACCINATION_NOTICE_DAYS:
+            due = first + timedelta(days=offset + days)
+            if due > until:
+                days_left[due] = (due - today).days
+    return days_left
+
+
+async def _vaccination_sweep(until: date | None = None):
+    # Рассылает уведомления за все дни после последнего обхода по until включительно:
+    # если бот не работал в час обхода, уведомления уйдут с опозданием, но уйдут
+    today = datetime.now(TIMEZONE).date()
+    until = until or today
+    keys = _state_keys(VACCINATION_SWEEP_JOB_ID)
+    if not keys:
+        return
+
+    async with AsyncSession() as session:
+        last_sweeps = await get_last_ticks(session, keys)
+
+    notified = 0
+    advanced = 0
+    for key, shards in keys.items():
+        last_sweep = last_sweeps.get(key)
+        # Первый обход: прошлые дни не восстанавливаются, их обработала прежняя версия
+        first = today
+        if last_sweep is not None:
+            first = datetime.fromtimestamp(last_sweep, TIMEZONE).date() + timedelta(days=1)
+        if first > until:
+            continue
+        if first < until:
+            logger.warning(f"Обход вакцинаций пропущен начиная с {first:%d.%m}, досылаем уведомления")
+
+        days_left = _vaccination_days_left(first, until, today)
+        after_id = 0
+        async with AsyncSession() as session:
+            while True:
+                batch = await get_vaccinations_due(
+                    session, days_left, after_id, VACCINATION_BATCH_SIZE, shards, overdue_until=until
+                )
+                rows = []
+                for pet_id, chat_id, pet_name, due in batch:
+                    left = days_left.get(due, 0)
+                    rows.append((f"vacc:{pet_id}:{due.isoformat()}:{left}", chat_id, _vaccination_message(pet_name, left)))
+                await _notify(rows)
+                notified += len(batch)
+                if len(batch) < VACCINATION_BATCH_SIZE:
+                    break
+                after_id = batch[-1][0]
+
+            advanced += await advance_vaccinations_due(session, until, shards)
+            await save_last_ticks(session, [key], TIMEZONE.localize(datetime.combine(until, datetime.min.time())).timestamp())
+
+    logger.info(f"Обход вакцинаций: уведомлений {notified}, перенесено на следующий год {advanced}")
+
+
+async def catch_up_vaccinations():
+    # При запуске: если сегодняшний обход уже должен был пройти, он выполняется сразу,
+    # иначе досылаются только дни до вчерашнего
+    now = datetime.now(TIMEZONE)
+    until = now.date() if now.hour >= VACCINATION_SWEEP_HOUR else now.date() - timedelta(days=1)
+    await _vaccination_sweep(until)
+
+
+def _reminder_slots_for(minute_of_day: int, weekdays: int) -> list[tuple[int, int]]:
+    return [(weekday, minute_of_day) for weekday in range(7) if weekdays & (1 << weekday)]
+
+
+def _bucket_reminder(reminder_id: int, pet_id: int, minute_of_day: int, weekdays: int):
+    _unbucket_reminder(reminder_id)
+
+    slots = _reminder_slots_for(minute_of_day, weekdays)
+    for slot in slots:
+        _buckets.setdefault(slot, set()).add(reminder_id)
+    _reminder_slots[reminder_id] = slots
+    _pet_reminders.setdefault(pet_id, set()).add(reminder_id)
+    _reminder_pets[reminder_id] = pet_id
+
+
+def _unbucket_reminder(reminder_id: int) -> bool:
+    slots = _reminder_slots.pop(reminder_id, None)
+    if slots is None:
+        return False
+
+    for slot in slots:
+        bucket = _buckets.get(slot)
+        if bucket is not None:
+            bucket.discard(reminder_id)
+            if not bucket:
+                del _buckets[slot]
+
+    pet_id = _reminder_pets.pop(reminder_id, None)
+    pet_reminders = _pet_reminders.get(pet_id)
+    if pet_reminders is not None:
+        pet_reminders.discard(reminder_id)
+        if not pet_reminders:
+            del _pet_reminders[pet_id]
+    return True
+
+
+def _tick_key(shard: int | None = None) -> str:
+    return "tick" if shard is None else f"tick:{shard}"
+
+
+async def _save_ticks(keys: list[str], processed_at: float):
+    for key in keys:
+        _last_ticks[key] = processed_at
+    try:
+        async with AsyncSession() as session:
+            await save_last_ticks(session, keys, processed_at)
+    except Exception as e:
+        logger.error(f"Ошибка сохранения последнего тика: {e}")
+
+
+def _feeding_rows(targets, at: datetime) -> list[tuple[str, int, str]]:
+    # Тот же key получает и догоняющий проход, поэтому минута не уйдёт дважды
+    return [
+        (f"feed:{reminder_id}:{int(at.timestamp())}", chat_id, f"⏰ Пора покормить {pet_name}!")
+        for reminder_id, chat_id, pet_name in targets
+    ]
+
+
+async def _tick():
+    now = datetime.now(TIMEZONE).replace(second=0, microsecond=0)
+    if _shards is not None:
+        await _tick_shards(now)
+        return
+
+    # Минуту уже обработал догоняющий проход при запуске
+    if _last_ticks.get(_tick_key(), float('-inf')) >= now.timestamp():
+        return
+
+    reminder_ids = _buckets.get((now.weekday(), now.hour * 60 + now.minute))
+    if reminder_ids:
+        async with AsyncSession() as session:
+            targets = await get_reminder_targets(session, reminder_ids)
+
+        await _notify(_feeding_rows(targets, now))
+
+    await _save_ticks([_tick_key()], now.timestamp())
+
+
+async def _tick_shards(now: datetime):
+    # Напоминание могли изменить в другом процессе, поэтому корзины
+    # не используются, а минута выбирается из базы по индексу
+    global _ticked_shards
+    shard_count, owned = _shards.shards
+    gained = owned - _ticked_shards
+    for shard in _ticked_shards - owned:
+        # Пока шард у другого процесса, его тик в памяти устаревает
+        _last_ticks.pop(_tick_key(shard), None)
+    _ticked_shards = owned
+    if gained:
+        logger.info(f"Получены шарды {sorted(gained)}, досылаем пропущенное")
+        keys = {_tick_key(shard): (shard_count, {shard}) for shard in gained}
+        await catch_up_reminders(_catch_up_hours, _catch_up_summary, keys, now - timedelta(minutes=1))
+        await catch_up_vaccinations()
+
+    owned = {shard for shard in owned if _last_ticks.get(_tick_key(shard), float('-inf')) < now.timestamp()}
+    if not owned:
+        return
+
+    async with AsyncSession() as session:
+        targets = await get_due_reminder_targets(
+            session, now.weekday(), now.hour * 60 + now.minute, (shard_count, owned)
+        )
+
+    await _notify(_feeding_rows(targets, now))
+    await _save_ticks([_tick_key(shard) for shard in owned], now.timestamp())
+
+
+def _missed_days(start: datetime, end: datetime) -> list[tuple[datetime, int, int]]:
+    # Дни между start (не включая) и end (включая): (полночь, первая минута, последняя минута)
+    days = []
+    day = start.replace(hour=0, minute=0)
+    while day <= end:
+        low = start.hour * 60 + start.minute + 1 if day.date() == start.date() else 0
+        high = end.hour * 60 + end.minute if day.date() == end.date() else 24 * 60 - 1
+        if low <= high:
+            days.append((day, low, high))
+        day = TIMEZONE.localize(day.replace(tzinfo=None) + timedelta(days=1))
+    return days
+
+
+async def _collect_missed(start: datetime, end: datetime, shards) -> list[tuple[int, datetime, str, int]]:
+    # (chat_id, время срабатывания, кличка, reminder_id) для всех пропущенных срабатываний за один запрос
+    days = _missed_days(start, end)
+    if not days:
+        return []
+
+    async with AsyncSession() as session:
+        rows = await get_reminders_between(session, [(low, high) for _, low, high in days], shards)
+
+    missed = []
+    for reminder_id, chat_id, pet_name, minute_of_day, weekdays in rows:
+        for day, low, high in days:
+            if low <= minute_of_day <= high and weekdays & (1 << day.weekday()):
+                missed.append((chat_id, day + timedelta(minutes=minute_of_day), pet_name, reminder_id))
+    return missed
+
+
+def _catch_up_messages(missed, summary: bool) -> list[tuple[str, int, str]]:
+    missed.sort(key=lambda item: (item[0], item[1]))
+    if not summary:
+        return [
+            (
+                f"feed:{reminder_id}:{int(at.timestamp())}",
+                chat_id,
+                f"⏰ Пора покормить {pet_name}! (напоминание на {format_time(at.hour * 60 + at.minute)})"
+            )
+            for chat_id, at, pet_name, reminder_id in missed
+        ]
+
+    by_chat: dict[int, list[str]] = {}
+    first_missed: dict[int, datetime] = {}
+    for chat_id, at, pet_name, reminder_id in missed:
+        first_missed.setdefault(chat_id, at)
+        by_chat.setdefault(chat_id, []).append(
+            f"{WEEKDAY_NAMES[at.weekday()]} {format_time(at.hour * 60 + at.minute)} — покормить {pet_name}"
+        )
+    # Первое пропущенное срабатывание не меняется, если запуск прервался и повторился
+    return [
+        (
+            f"catch_up:{chat_id}:{int(first_missed[chat_id].timestamp())}",
+            chat_id,
+            "Пока бот не работал, пропущены напоминания:\n" + "\n".join(lines)
         )
+        for chat_id, lines in by_chat.items()
+    ]
+
+
+async def catch_up_reminders(
+    max_hours: float = CATCH_UP_HOURS,
+    summary: bool = True,
+    groups: dict[str, tuple | None] | None = None,
+    now: datetime | None = None
+):
+    # Вызывается при запуске до первого тика и для шардов, перешедших от другого процесса.
+    # Пропущенное по now включительно записывается в outbox, и только потом тик отмечается обработанным
+    now = now or datetime.now(TIMEZONE).replace(second=0, microsecond=0)
+    groups = _state_keys(_tick_key()) if groups is None else groups
+    if not groups:
+        return
+
+    async with AsyncSession() as session:
+        last_ticks = await get_last_ticks(session, groups.keys())
+
+    limit = now - timedelta(hours=max_hours)
+    missed = []
+    for key, shards in groups.items():
+        last_tick = last_ticks.get(key)
+        if last_tick is None:
+            # Первый запуск: пропускать нечего
+            continue
+        start = datetime.fromtimestamp(last_tick, TIMEZONE)
+        if start < limit:
+            logger.warning(f"Бот не работал с {start:%d.%m %H:%M}, досылаем напоминания только с {limit:%d.%m %H:%M}")
+            start = limit
+        missed.extend(await _collect_missed(start, now, shards))
+
+    if missed:
+        messages = _catch_up_messages(missed, summary)
+        await _notify(messages)
+        logger.info(f"Пропущено напоминаний: {len(missed)}, сообщений к отправке: {len(messages)}")
+    await _save_ticks(list(groups), now.timestamp())
+
+
+async def schedule_reminder(reminder_id: int):
+    # Перекладывает в корзины только одно напоминание, не трогая остальные
+    if _shards is not None:
+        return
+    try:
+        async with AsyncSession() as session:
+            row = await get_reminder_schedule(session, reminder_id)
+
+        if not row:
+            remove_reminder(reminder_id)
+            return
 
-        logger.info(f"Напоминание о вакцинации установлено для {pet_name} на {next_vacc_date}")
+        _bucket_reminder(*row)
     except Exception as e:
-        logger.error(f"Ошибка создания напоминания о вакцинации: {e}")
+        logger.error(f"Ошибка напоминания {reminder_id}: {e}")
         raise
 
 
-async def schedule_jobs(bot: Bot):
+def remove_pet_jobs(pet_id: int):
+    for reminder_id in list(_pet_reminders.get(pet_id, ())):
+        _unbucket_reminder(reminder_id)
+
+
+async def schedule_jobs(
+    bot: Bot,
+    send_queue: SendQueue | None = None,
+    shards: ShardManager | None = None,
+    catch_up_hours: float = CATCH_UP_HOURS,
+    catch_up_summary: bool = True
+):
+    # Выполняется при запуске бота: корзины собираются из базы, задачи заводятся заново,
+    # пропущенное, пока бот не работал, досылается до первого тика
+    global _bot, _send_queue, _shards, _outbox, _catch_up_hours, _catch_up_summary, _ticked_shards
+    _bot = bot
+    _send_queue = send_queue
+    _shards = shards
+    _catch_up_hours = catch_up_hours
+    _catch_up_summary = catch_up_summary
+    if _outbox is None:
+        _outbox = Outbox(_send, shards=shards)
+    _outbox.shards = shards
+    _outbox.start()
+
     try:
-        for job in scheduler.get_jobs():
-            if job.id and job.id.startswith(("reminder_", "vacc_")):
-                scheduler.remove_job(job.id)
+        if not scheduler.running:
+            scheduler.start(paused=True)
+
+        _buckets.clear()
+        _reminder_slots.clear()
+        _pet_reminders.clear()
+        _reminder_pets.clear()
+        _suspended.clear()
+        if shards is None:
+            async with AsyncSession() as session:
+                reminders = await get_reminder_schedules(session)
+                _suspended.update(await get_inactive_user_ids(session))
 
-        with Session() as session:
-            reminders = session.query(Reminder).all()
-            for reminder in reminders:
+            for row in reminders:
                 try:
-                    if not reminder.pet:
-                        continue
-
-                    hour, minute = map(int, reminder.time.split(':'))
-                    days = "daily" if reminder.days == "daily" else reminder.days
-                    job_id = f"reminder_{reminder.id}_{uuid.uuid4().hex[:4]}"
-
-                    scheduler.add_job(
-                        send_notification,
-                        'cron',
-                        day_of_week=None if reminder.days == "daily" else days,
-                        hour=hour,
-                        minute=minute,
-                        args=[bot, reminder.pet.owner.telegram_id, f"⏰ Пора покормить {reminder.pet.name}!"],
-                        id=job_id,
-                        timezone='Europe/Moscow',
-                        misfire_grace_time=300
-                    )
+                    _bucket_reminder(*row)
                 except Exception as e:
-                    logger.error(f"Ошибка напоминания {reminder.id}: {e}")
+                    logger.error(f"Ошибка напоминания {row[0]}: {e}")
 
+        scheduler.add_job(
+            _tick,
+            'cron',
+            second=0,
+            id=TICK_JOB_ID,
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+            misfire_grace_time=30
+        )
+        scheduler.add_job(
+            _vaccination_sweep,
+            'cron',
+            hour=VACCINATION_SWEEP_HOUR,
+            minute=0,
+            id=VACCINATION_SWEEP_JOB_ID,
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+            misfire_grace_time=3600
+        )
+        logger.info(f"Задачи заведены, напоминаний в корзинах {len(_reminder_slots)}")
 
-            pets = session.query(Pet).all()
-            for pet in pets:
-                if pet.vaccination_date:
-                    try:
-                        await schedule_vaccination_reminder(
-                            bot, pet.id, pet.owner.telegram_id,
-                            pet.name, pet.vaccination_date
-                        )
-                    except Exception as e:
-                        logger.error(f"Ошибка вакцинации {pet.id}: {e}")
+        _ticked_shards = shards.shards[1] if shards is not None else frozenset()
+        await catch_up_reminders(catch_up_hours, catch_up_summary)
+        await catch_up_vaccinations()
 
-        if not scheduler.running:
-            scheduler.start()
-            logger.info("Планировщик задач запущен")
+        scheduler.resume()
+        logger.info("Планировщик задач запущен")
     except Exception as e:
         logger.error(f"Ошибка планировщика: {e}")
         raise
@@ -115,12 +576,7 @@ async def schedule_jobs(bot: Bot):
 
 def remove_reminder(reminder_id: int):
     try:
-        removed = False
-        for job in scheduler.get_jobs():
-            if job.id and (f"reminder_{reminder_id}_" in job.id or f"vacc_{reminder_id}_" in job.id):
-                scheduler.remove_job(job.id)
-                removed = True
-        return removed
+        return _unbucket_reminder(reminder_id)
     except Exception as e:
         logger.error(f"Ошибка удаления напоминания: {e}")
-        return False
\ No newline at end of file
+        return False
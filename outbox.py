@@ -0,0 +1,268 @@
+from database import AsyncSession, OutboxMessage
+from sharding import ShardManager
+from sqlalchemy import select, update, delete
+from sqlalchemy.dialects.sqlite import insert
+from typing import Awaitable, Callable
+import asyncio
+import logging
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Уведомления сначала записываются в таблицу outbox, а отправляются отдельным циклом.
+# Строка помечается отправленной только после ответа Telegram, поэтому после падения
+# процесса недоставленное уйдёт при следующем запуске (возможен повтор, но не потеря).
+# Повторная запись с тем же key игнорируется.
+# Уведомления одному чату за это окно склеиваются в одно сообщение:
+# тик и обход вакцинаций срабатывают в начале одной и той же минуты
+COALESCE_WINDOW = 2.0
+BATCH_SIZE = 500
+# Сколько чатов одновременно ждут ответа Telegram, пока выбираются новые строки
+MAX_IN_FLIGHT = 2000
+MAX_ATTEMPTS = 5
+# Telegram не принимает сообщения длиннее
+MESSAGE_LIMIT = 4096
+RETRY_DELAY = 60
+RETENTION = 24 * 60 * 60
+
+
+class Outbox:
+    def __init__(
+        self,
+        send: Callable[[int, str], Awaitable[bool]],
+        shards: ShardManager | None = None,
+        session_maker=AsyncSession,
+        coalesce_window: float = COALESCE_WINDOW,
+        poll_interval: float = 30.0,
+        batch_size: int = BATCH_SIZE,
+        max_in_flight: int = MAX_IN_FLIGHT
+    ):
+        self.send = send
+        self.shards = shards
+        self.session_maker = session_maker
+        self.coalesce_window = coalesce_window
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._pruned_at = 0.0
+
+    async def add(self, rows: list[tuple[str, int, str]]):
+        # rows — (key, chat_id, text), записываются одним executemany
+        if not rows:
+            return
+        now = time.time()
+        async with self.session_maker() as session:
+            await session.execute(
+                insert(OutboxMessage).on_conflict_do_nothing(index_elements=[OutboxMessage.key]),
+                [
+                    {"key": key, "chat_id": chat_id, "text": text, "next_attempt_at": now, "created_at": now}
+                    for key, chat_id, text in rows
+                ]
+            )
+            await session.commit()
+        self._wakeup.set()
+
+    def start(self):
+        if self._task is None:
+            # Сразу отправляем то, что осталось с прошлого запуска
+            self._wakeup.set()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        # Отправляем накопленное и дожидаемся ответа на уже отправленное
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def flush(self) -> int:
+        # Без окна склейки: всё, что уже записано, отправляется сразу
+        self._wakeup.clear()
+        try:
+            return await self.drain()
+        except Exception as e:
+            logger.error(f"Ошибка отправки уведомлений из outbox: {e}")
+            return 0
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                await asyncio.sleep(self.coalesce_window)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.drain(self.coalesce_window)
+                if time.time() - self._pruned_at > self.poll_interval:
+                    await self._prune()
+            except Exception as e:
+                logger.error(f"Ошибка отправки уведомлений из outbox: {e}")
+
+    def _due_query(self, now: float, busy_chats):
+        query = (
+            select(OutboxMessage.id, OutboxMessage.chat_id, OutboxMessage.text, OutboxMessage.attempts)
+            .where(OutboxMessage.next_attempt_at <= now)
+            .order_by(OutboxMessage.id)
+            .limit(self.batch_size)
+        )
+        if busy_chats:
+            query = query.where(OutboxMessage.chat_id.not_in(list(busy_chats)))
+        if self.shards is not None:
+            shard_count, owned = self.shards.shards
+            query = query.where((OutboxMessage.chat_id % shard_count).in_(list(owned)))
+        return query
+
+    async def drain(self, coalesce_window: float = 0.0) -> int:
+        # Новые строки выбираются, пока идут отправки. Чаты, которым сообщение уже
+        # отправляется, в выборку не попадают, а строки чата отмечаются по его ответу:
+        # чат, ждущий флуд-контроля, не задерживает остальных.
+        # coalesce_window — сколько ждать после add, прежде чем выбрать новые строки
+        sent = 0
+        async with self._lock:
+            in_flight: dict[int, asyncio.Task] = {}
+            wakeup: asyncio.Task | None = None
+            try:
+                while True:
+                    async with self.session_maker() as session:
+                        rows = (await session.execute(self._due_query(time.time(), in_flight))).all()
+
+                    by_chat: dict[int, list] = {}
+                    for row in rows:
+                        by_chat.setdefault(row.chat_id, []).append(row)
+                    for chat_id, chat_rows in by_chat.items():
+                        in_flight[chat_id] = asyncio.create_task(self._deliver(chat_id, chat_rows))
+
+                    if len(rows) == self.batch_size and len(in_flight) < self.max_in_flight:
+                        continue
+                    if not in_flight:
+                        break
+
+                    # Ждём первого ответа или новых строк из add
+                    if wakeup is None:
+                        wakeup = asyncio.create_task(self._wakeup.wait())
+                    done, _ = await asyncio.wait([*in_flight.values(), wakeup], return_when=asyncio.FIRST_COMPLETED)
+                    if wakeup in done:
+                        wakeup = None
+                        if coalesce_window:
+                            await asyncio.sleep(coalesce_window)
+                        self._wakeup.clear()
+
+                    sent_ids = []
+                    failed = []
+                    for chat_id, task in list(in_flight.items()):
+                        if task.done():
+                            del in_flight[chat_id]
+                            for chunk_rows, result in task.result():
+                                if result is True:
+                                    sent_ids.extend(row.id for row in chunk_rows)
+                                else:
+                                    failed.extend(chunk_rows)
+                    if sent_ids or failed:
+                        await self._finish(sent_ids, failed)
+                        sent += len(sent_ids)
+            finally:
+                # При ошибке или отмене неотмеченные строки останутся к отправке
+                for task in [*in_flight.values(), *([wakeup] if wakeup is not None else [])]:
+                    task.cancel()
+        return sent
+
+    async def _deliver(self, chat_id: int, rows: list) -> list[tuple[list, bool]]:
+        # Строки отмечаются по сообщению, в которое попал их текст
+        results = []
+        for chunk_rows, messages in _chunks(rows):
+            result = True
+            for message in messages:
+                try:
+                    result = await self.send(chat_id, message)
+                except Exception as e:
+                    logger.error(f"Ошибка отправки уведомления для {chat_id}: {e}")
+                    result = False
+                if result is not True:
+                    break
+            results.append((chunk_rows, result))
+        return results
+
+    async def _finish(self, sent_ids: list[int], failed: list):
+        now = time.time()
+        async with self.session_maker() as session:
+            if sent_ids:
+                await session.execute(
+                    update(OutboxMessage)
+                    .where(OutboxMessage.id.in_(sent_ids))
+                    .values(next_attempt_at=None)
+                )
+            if failed:
+                retries = []
+                for row in failed:
+                    attempts = row.attempts + 1
+                    if attempts >= MAX_ATTEMPTS:
+                        logger.error(f"Уведомление {row.id} для {row.chat_id} не отправлено после {attempts} попыток")
+                        next_attempt_at = None
+                    else:
+                        next_attempt_at = now + RETRY_DELAY * 2 ** row.attempts
+                    retries.append({"id": row.id, "attempts": attempts, "next_attempt_at": next_attempt_at})
+                await session.execute(update(OutboxMessage), retries)
+            await session.commit()
+
+    async def _prune(self):
+        # Отправленные и брошенные уведомления нужны только для проверки key
+        self._pruned_at = time.time()
+        async with self.session_maker() as session:
+            await session.execute(
+                delete(OutboxMessage).where(
+                    OutboxMessage.next_attempt_at.is_(None),
+                    OutboxMessage.created_at < self._pruned_at - RETENTION
+                )
+            )
+            await session.commit()
+
+
+def _split_text(text: str) -> list[str]:
+    # Текст длиннее MESSAGE_LIMIT делится по строкам, слишком длинная строка — по лимиту
+    parts = []
+    current = ""
+    for line in text.split("\n"):
+        while len(line) > MESSAGE_LIMIT:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(line[:MESSAGE_LIMIT])
+            line = line[MESSAGE_LIMIT:]
+        if current and len(current) + 1 + len(line) > MESSAGE_LIMIT:
+            parts.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _chunks(rows: list) -> list[tuple[list, list[str]]]:
+    # (строки outbox, сообщения): одинаковые тексты отправляются один раз,
+    # разные склеиваются, пока сообщение не длиннее MESSAGE_LIMIT
+    by_text: dict[str, list] = {}
+    for row in rows:
+        by_text.setdefault(row.text, []).append(row)
+
+    chunks = []
+    chunk_rows: list = []
+    chunk_text = ""
+    for text, text_rows in by_text.items():
+        if chunk_rows and len(chunk_text) + 1 + len(text) > MESSAGE_LIMIT:
+            chunks.append((chunk_rows, [chunk_text]))
+            chunk_rows, chunk_text = [], ""
+        if len(text) > MESSAGE_LIMIT:
+            chunks.append((text_rows, _split_text(text)))
+            continue
+        chunk_rows.extend(text_rows)
+        chunk_text = f"{chunk_text}\n{text}" if chunk_text else text
+    if chunk_rows:
+        chunks.append((chunk_rows, [chunk_text]))
+    return chunks
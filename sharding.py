@@ -0,0 +1,149 @@
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.dialects.sqlite import insert
+from database import AsyncSession, ShardLease, ShardWorker
+import asyncio
+import logging
+import math
+import os
+import socket
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Пользователи делятся на шарды по telegram_id % shard_count. Каждый процесс
+# продлевает аренду своих шардов раз в heartbeat_interval секунд; шарды
+# процесса, который перестал продлевать аренду, через lease_ttl забирают
+# остальные. Шарды делятся поровну между живыми процессами.
+DEFAULT_LEASE_TTL = 30.0
+DEFAULT_HEARTBEAT_INTERVAL = 10.0
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class ShardManager:
+    def __init__(
+        self,
+        shard_count: int,
+        worker_id: str | None = None,
+        lease_ttl: float = DEFAULT_LEASE_TTL,
+        heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL,
+        session_maker=AsyncSession
+    ):
+        self.shard_count = shard_count
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_ttl = lease_ttl
+        self.heartbeat_interval = heartbeat_interval
+        self.session_maker = session_maker
+        self.owned: frozenset[int] = frozenset()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def shards(self) -> tuple[int, frozenset[int]]:
+        return self.shard_count, self.owned
+
+    async def start(self):
+        # Первый захват сразу, чтобы тик после запуска уже знал свои шарды
+        await self.heartbeat()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def wait_for_shards(self, timeout: float) -> bool:
+        # Ждёт, пока истечёт аренда процесса, который упал, не освободив шарды.
+        # False, если за timeout процесс так и не получил все шарды
+        deadline = time.monotonic() + timeout
+        while len(self.owned) < self.shard_count and time.monotonic() < deadline:
+            await asyncio.sleep(1)
+        return len(self.owned) == self.shard_count
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await self.release()
+        except Exception as e:
+            logger.error(f"Ошибка освобождения шардов: {e}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                logger.error(f"Ошибка продления аренды шардов: {e}")
+
+    async def heartbeat(self):
+        now = time.time()
+        expires_at = now + self.lease_ttl
+
+        async with self.session_maker() as session:
+            await session.execute(
+                insert(ShardWorker)
+                .values(worker_id=self.worker_id, expires_at=expires_at)
+                .on_conflict_do_update(index_elements=[ShardWorker.worker_id], set_={"expires_at": expires_at})
+            )
+            await session.execute(delete(ShardWorker).where(ShardWorker.expires_at <= now))
+            await session.execute(
+                insert(ShardLease).on_conflict_do_nothing(),
+                [{"shard": shard, "owner": None, "expires_at": 0} for shard in range(self.shard_count)]
+            )
+            await session.execute(
+                update(ShardLease).where(ShardLease.owner == self.worker_id).values(expires_at=expires_at)
+            )
+
+            workers = await session.scalar(select(func.count()).select_from(ShardWorker))
+            fair_share = math.ceil(self.shard_count / max(workers, 1))
+
+            leases = (await session.execute(
+                select(ShardLease.shard, ShardLease.owner, ShardLease.expires_at)
+                .where(ShardLease.shard < self.shard_count)
+                .order_by(ShardLease.shard)
+            )).all()
+            owned = [shard for shard, owner, _ in leases if owner == self.worker_id]
+            free = [
+                shard for shard, owner, lease_expires_at in leases
+                if owner != self.worker_id and (owner is None or lease_expires_at <= now)
+            ]
+
+            if len(owned) > fair_share:
+                # Лишние шарды отдаём новым процессам
+                released = owned[fair_share:]
+                owned = owned[:fair_share]
+                await session.execute(
+                    update(ShardLease)
+                    .where(ShardLease.shard.in_(released), ShardLease.owner == self.worker_id)
+                    .values(owner=None, expires_at=0)
+                )
+            else:
+                for shard in free[:fair_share - len(owned)]:
+                    # Условие в UPDATE не даёт двум процессам забрать один шард
+                    result = await session.execute(
+                        update(ShardLease)
+                        .where(
+                            ShardLease.shard == shard,
+                            (ShardLease.owner.is_(None)) | (ShardLease.expires_at <= now)
+                        )
+                        .values(owner=self.worker_id, expires_at=expires_at)
+                    )
+                    if result.rowcount:
+                        owned.append(shard)
+
+            await session.commit()
+
+        owned = frozenset(owned)
+        if owned != self.owned:
+            logger.info(f"Шарды процесса {self.worker_id}: {sorted(owned)} из {self.shard_count}")
+        self.owned = owned
+
+    async def release(self):
+        async with self.session_maker() as session:
+            await session.execute(
+                update(ShardLease).where(ShardLease.owner == self.worker_id).values(owner=None, expires_at=0)
+            )
+            await session.execute(delete(ShardWorker).where(ShardWorker.worker_id == self.worker_id))
+            await session.commit()
+        self.owned = frozenset()
@@ -0,0 +1,43 @@
+import asyncio
+import os
+import sys
+import tempfile
+
+import pytest
+
+# database.py открывает базу при импорте, поэтому путь задаётся до него
+os.environ.setdefault("DATABASE_PATH", os.path.join(tempfile.mkdtemp(), "pets.db"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def run():
+    # Соединения aiosqlite привязаны к циклу событий, а asyncio.run каждый раз создаёт новый
+    import database
+
+    def run(coro):
+        async def wrapped():
+            try:
+                return await coro
+            finally:
+                await database.async_engine.dispose()
+        return asyncio.run(wrapped())
+    return run
+
+
+class FakeOutbox:
+    def __init__(self):
+        self.rows = []
+
+    async def add(self, rows):
+        self.rows.extend(rows)
+
+
+@pytest.fixture
+def outbox(monkeypatch):
+    # Уведомления notifications.py записываются в список вместо таблицы outbox
+    import notifications
+    fake = FakeOutbox()
+    monkeypatch.setattr(notifications, "_outbox", fake)
+    monkeypatch.setattr(notifications, "_shards", None)
+    return fake
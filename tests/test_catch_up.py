@@ -0,0 +1,135 @@
+from datetime import datetime, date, timedelta
+
+import pytest
+from sqlalchemy import select
+
+import database
+import notifications
+from database import AsyncSession, User, Pet, PetType, Reminder, EVERY_DAY, save_last_ticks
+from notifications import TIMEZONE
+
+MONDAY = 1 << 0
+TUESDAY = 1 << 1
+
+
+def moscow(*args) -> datetime:
+    return TIMEZONE.localize(datetime(*args))
+
+
+def add_user(telegram_id: int, reminders=(), vaccinations=()) -> dict:
+    # reminders — (минута суток, маска дней); vaccinations — (кличка, дата прививки)
+    with database.Session() as session:
+        user = User(telegram_id=telegram_id)
+        session.add(user)
+        session.flush()
+        pet = Pet(name=f"pet{telegram_id}", pet_type=PetType.DOG, owner_id=user.id)
+        session.add(pet)
+        session.flush()
+        ids = {}
+        for minute_of_day, weekdays in reminders:
+            reminder = Reminder(pet_id=pet.id, minute_of_day=minute_of_day, weekdays=weekdays)
+            session.add(reminder)
+            session.flush()
+            ids[(minute_of_day, weekdays)] = reminder.id
+        for name, due in vaccinations:
+            session.add(Pet(name=name, pet_type=PetType.CAT, owner_id=user.id, next_vaccination_due=due))
+        session.commit()
+    return ids
+
+
+def test_missed_days_cross_midnight():
+    # 2026-10-19 — понедельник
+    days = notifications._missed_days(moscow(2026, 10, 19, 23, 58), moscow(2026, 10, 20, 0, 2))
+    assert [(day.date(), low, high) for day, low, high in days] == [
+        (date(2026, 10, 19), 23 * 60 + 59, 23 * 60 + 59),
+        (date(2026, 10, 20), 0, 2),
+    ]
+    assert days[1][0] == moscow(2026, 10, 20, 0, 0)
+
+
+def test_missed_days_empty_when_nothing_passed():
+    now = moscow(2026, 10, 20, 12, 0)
+    assert notifications._missed_days(now, now) == []
+
+
+def test_collect_missed_respects_weekday_mask(run):
+    ids = add_user(2001, reminders=[
+        (23 * 60 + 59, MONDAY),
+        (23 * 60 + 59, TUESDAY),
+        (1, TUESDAY),
+        (1, MONDAY),
+    ])
+    missed = run(notifications._collect_missed(moscow(2026, 10, 19, 23, 58), moscow(2026, 10, 20, 0, 2), None))
+    assert sorted((at, reminder_id) for chat_id, at, _, reminder_id in missed if chat_id == 2001) == [
+        (moscow(2026, 10, 19, 23, 59), ids[(23 * 60 + 59, MONDAY)]),
+        (moscow(2026, 10, 20, 0, 1), ids[(1, TUESDAY)]),
+    ]
+
+
+@pytest.mark.parametrize("summary", [False, True])
+def test_catch_up_limited_to_max_hours(run, outbox, summary):
+    telegram_id = 2002 + summary
+    add_user(telegram_id, reminders=[(10 * 60, EVERY_DAY), (11 * 60, EVERY_DAY)])
+    now = moscow(2026, 10, 20, 12, 0)
+
+    async def catch_up():
+        async with AsyncSession() as session:
+            await save_last_ticks(session, ["tick"], (now - timedelta(days=2)).timestamp())
+        await notifications.catch_up_reminders(1.5, summary, now=now)
+        async with AsyncSession() as session:
+            return await database.get_last_ticks(session, ["tick"])
+
+    last_ticks = run(catch_up())
+    rows = [row for row in outbox.rows if row[1] == telegram_id]
+    assert len(rows) == 1
+    key, _, text = rows[0]
+    if summary:
+        assert key == f"catch_up:{telegram_id}:{int(moscow(2026, 10, 20, 11, 0).timestamp())}"
+        assert "11:00" in text and "10:00" not in text
+    else:
+        assert key.endswith(f":{int(moscow(2026, 10, 20, 11, 0).timestamp())}")
+    assert last_ticks["tick"] == now.timestamp()
+
+
+def test_vaccination_days_left():
+    today = date(2026, 10, 20)
+    assert notifications._vaccination_days_left(today, today, today) == {
+        today + timedelta(days=30): 30,
+        today + timedelta(days=7): 7,
+    }
+
+    days_left = notifications._vaccination_days_left(today - timedelta(days=2), today, today)
+    # Пропущенные этапы приходят с тем числом дней, что осталось сегодня
+    assert days_left[today + timedelta(days=5)] == 5
+    assert days_left[today + timedelta(days=28)] == 28
+    # Даты не позже сегодняшней выбираются как просроченные, а не по этапам
+    assert all(due > today for due in days_left)
+
+
+def test_vaccination_sweep_sends_missed_and_overdue(run, outbox):
+    today = datetime.now(TIMEZONE).date()
+    add_user(2010, vaccinations=[
+        ("overdue", today - timedelta(days=1)),
+        ("soon", today + timedelta(days=5)),
+        ("later", today + timedelta(days=10)),
+    ])
+
+    async def sweep():
+        async with AsyncSession() as session:
+            three_days_ago = TIMEZONE.localize(datetime.combine(today - timedelta(days=3), datetime.min.time()))
+            await save_last_ticks(session, ["vaccination_sweep"], three_days_ago.timestamp())
+        await notifications._vaccination_sweep(today)
+        first = [row for row in outbox.rows if row[1] == 2010]
+        await notifications._vaccination_sweep(today)
+        async with AsyncSession() as session:
+            overdue_due = await session.scalar(select(Pet.next_vaccination_due).where(Pet.name == "overdue"))
+        return first, overdue_due
+
+    first, overdue_due = run(sweep())
+    assert sorted(text for _, _, text in first) == [
+        "⏰ overdue, пора на ежегодную вакцинацию!",
+        "💉 Через 5 дн. у soon ежегодная вакцинация",
+    ]
+    # Повторный обход за тот же день ничего не добавляет
+    assert len([row for row in outbox.rows if row[1] == 2010]) == 2
+    assert overdue_due > today
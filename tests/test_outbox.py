@@ -0,0 +1,135 @@
+import time
+
+from sqlalchemy import select, update
+
+import database
+import notifications
+from database import AsyncSession, User, Pet, PetType, Reminder, EVERY_DAY, OutboxMessage
+from delivery import ChatUnavailable
+from outbox import Outbox, MAX_ATTEMPTS, RETRY_DELAY, MESSAGE_LIMIT, _chunks
+
+
+class FakeSend:
+    # Вместо Telegram: запоминает сообщения и отвечает result
+    def __init__(self, result=True):
+        self.result = result
+        self.messages = []
+
+    async def __call__(self, chat_id: int, text: str) -> bool:
+        self.messages.append((chat_id, text))
+        return self.result
+
+
+async def outbox_rows(chat_id: int):
+    async with AsyncSession() as session:
+        result = await session.execute(
+            select(OutboxMessage.key, OutboxMessage.attempts, OutboxMessage.next_attempt_at)
+            .where(OutboxMessage.chat_id == chat_id)
+            .order_by(OutboxMessage.id)
+        )
+        return result.all()
+
+
+def test_same_key_is_sent_once(run):
+    send = FakeSend()
+    outbox = Outbox(send)
+
+    async def scenario():
+        await outbox.add([("dedupe:1", 3001, "первое"), ("dedupe:1", 3001, "повтор")])
+        await outbox.flush()
+        # Тот же key после отправки тоже не повторяется
+        await outbox.add([("dedupe:1", 3001, "ещё раз")])
+        await outbox.flush()
+        return await outbox_rows(3001)
+
+    rows = run(scenario())
+    assert [text for chat_id, text in send.messages if chat_id == 3001] == ["первое"]
+    assert len(rows) == 1 and rows[0].next_attempt_at is None
+
+
+def test_failed_send_backs_off_then_gives_up(run):
+    outbox = Outbox(FakeSend(result=False))
+
+    async def scenario():
+        await outbox.add([("retry:1", 3002, "не дойдёт")])
+        started = time.time()
+        await outbox.flush()
+        first = await outbox_rows(3002)
+
+        # Последняя попытка: строка больше не повторяется
+        async with AsyncSession() as session:
+            await session.execute(
+                update(OutboxMessage)
+                .where(OutboxMessage.key == "retry:1")
+                .values(attempts=MAX_ATTEMPTS - 1, next_attempt_at=0)
+            )
+            await session.commit()
+        await outbox.flush()
+        return started, first, await outbox_rows(3002)
+
+    started, first, last = run(scenario())
+    assert first[0].attempts == 1
+    assert started + RETRY_DELAY <= first[0].next_attempt_at <= time.time() + RETRY_DELAY
+    assert last[0].attempts == MAX_ATTEMPTS
+    assert last[0].next_attempt_at is None
+
+
+def test_long_batch_is_split_at_message_limit(run):
+    send = FakeSend()
+    outbox = Outbox(send)
+    rows = [(f"long:{i}", 3003, f"⏰ Пора покормить питомца номер {i}!") for i in range(200)]
+
+    async def scenario():
+        await outbox.add(rows)
+        return await outbox.flush()
+
+    sent = run(scenario())
+    messages = [text for chat_id, text in send.messages if chat_id == 3003]
+    assert sent == 200
+    assert len(messages) > 1
+    assert all(len(text) <= MESSAGE_LIMIT for text in messages)
+    assert "\n".join(messages).count("⏰") == 200
+
+
+def test_overlong_text_is_split_by_lines():
+    class Row:
+        def __init__(self, text):
+            self.text = text
+
+    row = Row("\n".join("строка " * 50 for _ in range(100)))
+    [(chunk_rows, messages)] = _chunks([row])
+    assert chunk_rows == [row]
+    assert all(len(text) <= MESSAGE_LIMIT for text in messages)
+    assert "\n".join(messages) == row.text
+
+
+def test_unavailable_chat_is_suspended_and_settled(run, monkeypatch):
+    with database.Session() as session:
+        user = User(telegram_id=3004)
+        session.add(user)
+        session.flush()
+        pet = Pet(name="Blocked", pet_type=PetType.DOG, owner_id=user.id)
+        session.add(pet)
+        session.flush()
+        session.add(Reminder(pet_id=pet.id, minute_of_day=600, weekdays=EVERY_DAY))
+        session.commit()
+
+    async def blocked(bot, chat_id, message):
+        raise ChatUnavailable(chat_id)
+
+    monkeypatch.setattr(notifications, "send_notification", blocked)
+    monkeypatch.setattr(notifications, "_send_queue", None)
+    monkeypatch.setattr(notifications, "_shards", None)
+    outbox = Outbox(notifications._send)
+
+    async def scenario():
+        await outbox.add([("blocked:1", 3004, "первое"), ("blocked:2", 3004, "второе")])
+        sent = await outbox.flush()
+        async with AsyncSession() as session:
+            is_active = await session.scalar(select(User.is_active).where(User.telegram_id == 3004))
+        return sent, is_active, await outbox_rows(3004)
+
+    sent, is_active, rows = run(scenario())
+    assert sent == 2
+    assert is_active is False
+    assert all(row.next_attempt_at is None and row.attempts == 0 for row in rows)
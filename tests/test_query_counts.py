@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event
+
+import database
+from database import (
+    AsyncSession, User, Pet, PetType, Reminder, EVERY_DAY,
+    get_user_pets, get_user_reminders, get_user_reminder_schedules
+)
+
+SIZES = (1, 5, 20)
+REMINDERS_PER_PET = 2
+
+
+@pytest.fixture(scope="module")
+def users():
+    # telegram_id пользователя с size питомцами
+    telegram_ids = {}
+    with database.Session() as session:
+        for size in SIZES:
+            user = User(telegram_id=1000 + size)
+            session.add(user)
+            session.flush()
+            for number in range(size):
+                pet = Pet(name=f"pet{size}_{number}", pet_type=PetType.CAT, owner_id=user.id)
+                session.add(pet)
+                session.flush()
+                for minute in range(REMINDERS_PER_PET):
+                    session.add(Reminder(pet_id=pet.id, minute_of_day=minute, weekdays=EVERY_DAY))
+            telegram_ids[size] = user.telegram_id
+        session.commit()
+    return telegram_ids
+
+
+def count_queries(loader, telegram_id: int):
+    queries = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        queries.append(statement)
+
+    async def run():
+        try:
+            async with AsyncSession() as session:
+                rows = await loader(session, telegram_id)
+                # Обращение к связям не должно добавлять запросов
+                for row in rows:
+                    if isinstance(row, Reminder):
+                        row.pet.name
+                return rows
+        finally:
+            # Соединения aiosqlite привязаны к циклу событий, а asyncio.run создаёт новый
+            await database.async_engine.dispose()
+
+    engine = database.async_engine.sync_engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        rows = asyncio.run(run())
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return len(queries), len(rows)
+
+
+@pytest.mark.parametrize("loader", [get_user_pets, get_user_reminders, get_user_reminder_schedules])
+def test_query_count_does_not_grow_with_pets(users, loader):
+    counts = {}
+    for size, telegram_id in users.items():
+        counts[size], rows = count_queries(loader, telegram_id)
+        assert rows >= size
+    assert len(set(counts.values())) == 1, counts
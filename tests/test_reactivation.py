@@ -0,0 +1,63 @@
+from sqlalchemy import event, select
+
+import database
+import notifications
+from database import AsyncSession, User
+
+
+class Shards:
+    shards = (2, frozenset({0, 1}))
+
+
+def add_user(telegram_id: int, is_active: bool = True):
+    with database.Session() as session:
+        session.add(User(telegram_id=telegram_id, is_active=is_active))
+        session.commit()
+
+
+def statements(run, coro) -> list[str]:
+    queries = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        queries.append(statement.lstrip().split(None, 1)[0].upper())
+
+    engine = database.async_engine.sync_engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        run(coro)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return queries
+
+
+async def is_active(telegram_id: int) -> bool:
+    async with AsyncSession() as session:
+        return await session.scalar(select(User.is_active).where(User.telegram_id == telegram_id))
+
+
+def test_active_user_costs_no_queries_without_shards(run, outbox):
+    add_user(4001)
+    assert statements(run, notifications.ensure_chat_active(4001)) == []
+
+
+def test_suspended_user_is_reactivated_without_shards(run, outbox):
+    add_user(4002)
+    run(notifications.deactivate_chat(4002))
+    assert 4002 in notifications._suspended
+
+    run(notifications.ensure_chat_active(4002))
+    assert 4002 not in notifications._suspended
+    assert run(is_active(4002)) is True
+
+
+def test_sharded_check_writes_only_for_inactive_users(run, outbox, monkeypatch):
+    monkeypatch.setattr(notifications, "_shards", Shards())
+    add_user(4003)
+    add_user(4004, is_active=False)
+
+    assert statements(run, notifications.ensure_chat_active(4003)) == ["SELECT"]
+    # Повторная проверка в пределах ACTIVE_CHECK_TTL в базу не ходит
+    assert statements(run, notifications.ensure_chat_active(4003)) == []
+
+    assert "UPDATE" in statements(run, notifications.ensure_chat_active(4004))
+    assert run(is_active(4004)) is True
@@ -0,0 +1,51 @@
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.handler import CallableObject
+from aiogram.types import Message
+from typing import Any, Awaitable, Callable
+from metrics import observe_handler
+import logging
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class TextCommands(BaseMiddleware):
+    # Кнопки меню с точным текстом находятся одним поиском в словаре,
+    # до проверки фильтров роутера. Остальные сообщения идут дальше как обычно.
+    # Команда с stateless=True срабатывает только вне сценария, иначе текст
+    # достаётся обработчику текущего состояния.
+
+    def __init__(self):
+        self.routes: dict[str, tuple[CallableObject, bool]] = {}
+
+    def command(self, text: str, stateless: bool = False):
+        def decorator(callback):
+            if text in self.routes:
+                raise ValueError(f"Кнопка {text} уже зарегистрирована")
+            self.routes[text] = (CallableObject(callback), stateless)
+            return callback
+        return decorator
+
+    async def __call__(
+        self,
+        handler: Callable[[Message, dict[str, Any]], Awaitable[Any]],
+        event: Message,
+        data: dict[str, Any]
+    ) -> Any:
+        route = self.routes.get(event.text) if event.text else None
+        if route is None:
+            return await handler(event, data)
+
+        callback, stateless = route
+        if stateless and data.get("raw_state") is not None:
+            return await handler(event, data)
+        # Внутренние middleware роутера тут не вызываются, время меряем сами
+        started = time.perf_counter()
+        try:
+            result = await callback.call(event, **data)
+        except Exception:
+            observe_handler(callback.callback.__name__, started, failed=True)
+            raise
+        observe_handler(callback.callback.__name__, started)
+        return result
@@ -0,0 +1,91 @@
+from database import AsyncSession, Pet, Reminder, get_user_pets, get_user_reminders
+from collections import OrderedDict
+import logging
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Питомцы и напоминания пользователя по telegram_id, только для чтения.
+# Каждый обработчик, который что-то меняет, вызывает invalidate_user() после commit.
+# Объекты отсоединены от сессии и общие для всех запросов, менять их нельзя.
+CACHE_SIZE = 10000
+# Сброс кэша виден только своему процессу, поэтому с шардами, когда обновления
+# принимают несколько процессов, main.py выключает кэш: CACHE_TTL = 0
+CACHE_TTL = 300
+
+_entries: OrderedDict[int, tuple[float, dict]] = OrderedDict()
+# Время последнего изменения пользователя: снимок, который начали читать
+# до invalidate_user(), не должен попасть в кэш после неё
+_invalidated_at: dict[int, float] = {}
+# Дольше этого чтение из базы не идёт, более старые отметки не нужны
+INVALIDATION_HORIZON = 60
+
+
+def invalidate_user(telegram_id: int):
+    now = time.monotonic()
+    _entries.pop(telegram_id, None)
+    _invalidated_at[telegram_id] = now
+    if len(_invalidated_at) > CACHE_SIZE:
+        for old_id, invalidated_at in list(_invalidated_at.items()):
+            if now - invalidated_at > INVALIDATION_HORIZON:
+                del _invalidated_at[old_id]
+
+
+def configure(ttl: float):
+    global CACHE_TTL
+    CACHE_TTL = ttl
+    clear()
+
+
+def clear():
+    _entries.clear()
+    _invalidated_at.clear()
+
+
+def _get(telegram_id: int, kind: str):
+    entry = _entries.get(telegram_id)
+    if entry is None:
+        return None
+    loaded_at, snapshot = entry
+    if time.monotonic() - loaded_at > CACHE_TTL:
+        del _entries[telegram_id]
+        return None
+    _entries.move_to_end(telegram_id)
+    return snapshot.get(kind)
+
+
+def _put(telegram_id: int, kind: str, value, started_at: float):
+    if _invalidated_at.get(telegram_id, float('-inf')) >= started_at:
+        return
+    entry = _entries.get(telegram_id)
+    if entry is None:
+        entry = _entries[telegram_id] = (started_at, {})
+    entry[1][kind] = value
+    _entries.move_to_end(telegram_id)
+    while len(_entries) > CACHE_SIZE:
+        _entries.popitem(last=False)
+
+
+async def _load(telegram_id: int, kind: str, loader):
+    if CACHE_TTL <= 0:
+        async with AsyncSession() as session:
+            return tuple(await loader(session, telegram_id))
+
+    value = _get(telegram_id, kind)
+    if value is not None:
+        return value
+
+    started_at = time.monotonic()
+    async with AsyncSession() as session:
+        value = tuple(await loader(session, telegram_id))
+    _put(telegram_id, kind, value, started_at)
+    return value
+
+
+async def get_pets(telegram_id: int) -> tuple[Pet, ...]:
+    return await _load(telegram_id, "pets", get_user_pets)
+
+
+async def get_reminders(telegram_id: int) -> tuple[Reminder, ...]:
+    return await _load(telegram_id, "reminders", get_user_reminders)